@@ -6,8 +6,14 @@ WITH bechdel_imdb AS (
 ),
 
 title_ratings AS (
+    -- the base and changeset files keep every uploaded version
+    -- of a rating so only the one of the latest batch is used.
+    -- A row moved to another partition has a delete and an
+    -- upsert in the same batch, the upsert wins.
     SELECT *
     FROM {{ source('staging', 'imdb_title_ratings') }}
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY tconst ORDER BY batch DESC, op = 'upsert' DESC) = 1
 )
 
 SELECT DISTINCT
@@ -19,6 +25,7 @@ SELECT DISTINCT
 FROM bechdel_imdb AS b
     INNER JOIN title_ratings AS r
     ON b.imdbid = r.tconst
+WHERE r.op = 'upsert'
 {% if var('is_test')==True %}
 LIMIT 10000
 {% else %}
@@ -1,6 +1,15 @@
 {{ config(materialized='view') }}
 
-WITH bechdel_new AS (
+WITH bechdel_latest AS (
+    -- the base and delta files keep every uploaded version
+    -- of a movie so only the one of the latest batch is used
+    SELECT *
+    FROM {{ source('staging', 'bechdel') }}
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY id ORDER BY batch DESC) = 1
+),
+
+bechdel_new AS (
     SELECT 
         title, 
         CAST(imdbid AS INT64) AS imdbid,
@@ -13,7 +22,8 @@ WITH bechdel_new AS (
             WHEN rating = 3 THEN 'passed'
             ELSE "failed"
         END AS ratingRemark
-    FROM {{ source('staging', 'bechdel') }}
+    FROM bechdel_latest
+    WHERE op = 'upsert'
 ),
 
 non_unique AS (
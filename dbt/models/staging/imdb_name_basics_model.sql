@@ -1,24 +1,33 @@
 {{ config(materialized='view') }}
 
-WITH name_basics AS (
+WITH name_basics_latest AS (
+    -- the base and changeset files keep every uploaded version
+    -- of a person so only the one of the latest batch is used.
+    -- A row moved to another partition has a delete and an
+    -- upsert in the same batch, the upsert wins.
+    SELECT *
+    FROM {{ source('staging', 'imdb_name_basics') }}
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY nconst ORDER BY batch DESC, op = 'upsert' DESC) = 1
+),
+
+name_basics AS (
     SELECT 
         nconst,
         primaryName,
         birthYear,
-        SPLIT(primaryProfession, ',') AS primaryProfession,
-        SPLIT(knownForTitles, ',') AS knownForTitle
-    FROM {{ source('staging', 'imdb_name_basics') }}
+        primaryProfession,
+        knownForTitles
+    FROM name_basics_latest
+    WHERE op = 'upsert'
 )
 
 SELECT 
-    CAST(
-        REGEXP_REPLACE(knownForTitle, '[^0-9]', '')
-        AS INT64
-    ) AS tconst,
+    knownForTitle AS tconst,
     nconst,
     primaryName,
     birthYear,
     primaryProfession
 FROM name_basics
-CROSS JOIN UNNEST(name_basics.knownForTitle) AS knownForTitle
+CROSS JOIN UNNEST(name_basics.knownForTitles) AS knownForTitle
 CROSS JOIN UNNEST(name_basics.primaryProfession) AS primaryProfession
\ No newline at end of file
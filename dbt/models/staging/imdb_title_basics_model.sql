@@ -1,17 +1,27 @@
 {{ config(materialized='view') }}
 
-WITH title_basics AS (
+WITH title_basics_latest AS (
+    -- the base and changeset files keep every uploaded version
+    -- of a title so only the one of the latest batch is used.
+    -- A row moved to another partition has a delete and an
+    -- upsert in the same batch, the upsert wins.
+    SELECT *
+    FROM {{ source('staging', 'imdb_title_basics_new') }}
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY tconst ORDER BY batch DESC, op = 'upsert' DESC) = 1
+),
+
+title_basics AS (
     SELECT 
         tconst,
         titleType,
         primaryTitle,
         originalTitle,
         isAdult,
-        CAST(
-            EXTRACT(YEAR FROM startYear) AS INT64 
-        ) AS startYear,
-        SPLIT(genres, ',') AS genre
-    FROM {{ source('staging', 'imdb_title_basics_new') }}
+        CAST(startYear AS INT64) AS startYear,
+        genres
+    FROM title_basics_latest
+    WHERE op = 'upsert'
 )
 
 SELECT 
@@ -23,4 +33,4 @@ SELECT
     startYear,
     genre
 FROM title_basics
-CROSS JOIN UNNEST(title_basics.genre) AS genre
\ No newline at end of file
+CROSS JOIN UNNEST(title_basics.genres) AS genre
\ No newline at end of file
@@ -1,11 +1,23 @@
 {{ config(materialized='view') }}
 
-WITH title_crew AS (
+WITH title_crew_latest AS (
+    -- the base and changeset files keep every uploaded version
+    -- of a title so only the one of the latest batch is used.
+    -- A row moved to another partition has a delete and an
+    -- upsert in the same batch, the upsert wins.
+    SELECT *
+    FROM {{ source('staging', 'imdb_title_crew') }}
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY tconst ORDER BY batch DESC, op = 'upsert' DESC) = 1
+),
+
+title_crew AS (
     SELECT 
         tconst,
-        SPLIT(directors, ',') AS director,
-        SPLIT(writers, ',') AS writer
-    FROM {{ source('staging', 'imdb_title_crew') }}
+        directors,
+        writers
+    FROM title_crew_latest
+    WHERE op = 'upsert'
 )
 
 SELECT 
@@ -14,6 +26,6 @@ SELECT
     writer
 FROM ( 
         title_crew
-        CROSS JOIN UNNEST(title_crew.director) AS director
+        CROSS JOIN UNNEST(title_crew.directors) AS director
      )
-    CROSS JOIN UNNEST(title_crew.writer) AS writer
\ No newline at end of file
+    CROSS JOIN UNNEST(title_crew.writers) AS writer
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""----------------------------------------------------------------------
+Streaming decoder for the Bechdel Test API response. The json array of
+getAllMovies is read from the response stream one object at a time
+and written into typed Arrow record batches, so neither the raw body
+nor the full movie list has to be held in memory as Python objects.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import json
+import codecs
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BECHDEL_SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('imdbid', pa.int64()),
+    ('rating', pa.int8()),
+    ('id', pa.int32()),
+    ('year', pa.int16()),
+])
+
+#characters allowed between the objects of the array
+SEPARATORS = ' \t\r\n,'
+
+
+def iter_json_array(stream, chunk_size=64*1024):
+    """
+    Lazily decodes the objects of a top-level json array.
+
+    Arguments:
+        - stream: file-like object of the json bytes
+        - chunk_size: number of bytes read at a time.
+                      Default set to 64 KB.
+
+    Returns:
+        generator of decoded objects
+    """
+
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += text.decode(chunk, final=not chunk)
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in SEPARATORS:
+                position += 1
+
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Response is not a json array")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            #an object cut off at the end of the chunk is decoded
+            #again once the next chunk was read
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+
+            yield item
+
+        buffer = buffer[position:]
+
+        if not chunk:
+            raise ValueError("Unexpected end of json array")
+
+
+def to_int(value):
+    """
+    Converts API values like "0012345" or "tt0012345" to int.
+    Missing, empty or non-numeric values, e.g. typos in the
+    imdbid, are kept as None instead of failing the batch.
+    """
+
+    if value is None or isinstance(value, int):
+        return value
+
+    value = str(value).strip()
+    if value[:2].lower() == 'tt':
+        value = value[2:]
+
+    return int(value) if value.isdigit() else None
+
+
+def iter_bechdel_batches(stream, batch_size=10_000):
+    """
+    Decodes the getAllMovies response into typed record batches.
+
+    Arguments:
+        - stream: file-like object of the response body
+        - batch_size: number of movies per record batch.
+                      Default set to 10,000.
+
+    Returns:
+        generator of pyarrow RecordBatch following BECHDEL_SCHEMA
+    """
+
+    columns = {name: [] for name in BECHDEL_SCHEMA.names}
+
+    def to_batch():
+        arrays = [pa.array(columns[field.name], field.type)
+                  for field in BECHDEL_SCHEMA]
+        for values in columns.values():
+            values.clear()
+        return pa.RecordBatch.from_arrays(arrays, schema=BECHDEL_SCHEMA)
+
+    for movie in iter_json_array(stream):
+        columns['title'].append(movie.get('title'))
+        for name in ['imdbid', 'rating', 'id', 'year']:
+            columns[name].append(to_int(movie.get(name)))
+
+        if len(columns['id']) >= batch_size:
+            yield to_batch()
+
+    if len(columns['id']) > 0:
+        yield to_batch()
+
+
+def write_bechdel_parquet(stream, path, batch_size=10_000):
+    """
+    Writes the getAllMovies response directly into a Parquet file.
+
+    Arguments:
+        - stream: file-like object of the response body
+        - path: location of the Parquet file
+        - batch_size: number of movies per row group.
+                      Default set to 10,000.
+
+    Returns:
+        number of movies written
+    """
+
+    rows = 0
+    with pq.ParquetWriter(f'{path}.tmp', BECHDEL_SCHEMA,
+                          compression='zstd') as writer:
+        for batch in iter_bechdel_batches(stream, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+
+    #a failed download never replaces the last complete file
+    os.replace(f'{path}.tmp', path)
+
+    return rows
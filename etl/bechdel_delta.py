@@ -0,0 +1,161 @@
+"""----------------------------------------------------------------------
+Helpers for the incremental ingestion of the Bechdel Test movie list.
+The previous snapshot is kept as row hashes keyed by the Bechdel id so
+that only added, changed and removed movies are uploaded as a small
+delta file next to a periodically compacted base file.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import json
+import time
+import pandas as pd
+
+KEY = 'id'
+
+#columns compared between snapshots, in upload order
+COLUMNS = ['title', 'imdbid', 'rating', 'id', 'year']
+
+#integer columns are normalized so that missing values or a different
+#integer width do not make every row look changed
+INT_COLUMNS = ['imdbid', 'rating', 'id', 'year']
+
+#nullable dtypes of the uploaded files, same widths as BECHDEL_SCHEMA.
+#Every column is cast, so a delta of only deletes, whose title is all
+#missing, gets the same Parquet schema as the base.
+UPLOAD_DTYPES = {'title': 'string', 'imdbid': 'Int64', 'rating': 'Int8',
+                 'id': 'Int32', 'year': 'Int16', 'batch': 'int64',
+                 'op': 'string'}
+
+#a snapshot saved for an older upload format is never diffed against,
+#so the next run uploads a full base in the current format
+UPLOAD_FORMAT = 'parquet'
+
+
+def row_hashes(df):
+    """
+    Computes one hash per movie over all compared columns.
+
+    Arguments:
+        df: dataframe of the Bechdel movie list
+
+    Returns:
+        Series of uint64 hashes indexed by id
+    """
+
+    df = df[COLUMNS].copy()
+    for column in INT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+
+    hashes = pd.util.hash_pandas_object(df.astype('string'), index=False)
+    return pd.Series(hashes.values, index=df[KEY].values, name='hash')
+
+
+def diff_snapshot(previous, df):
+    """
+    Compares the current movie list with the hashes of the
+    previous snapshot.
+
+    Arguments:
+        - previous: Series of hashes indexed by id of the last snapshot
+        - df: dataframe of the current Bechdel movie list
+
+    Returns:
+        dataframes of added and changed movies, index of removed
+        ids, and the hashes of the current snapshot
+    """
+
+    df = df.drop_duplicates(KEY, keep='last')
+    hashes = row_hashes(df)
+
+    is_new = ~hashes.index.isin(previous.index)
+    known = hashes[~is_new]
+    is_changed = known.values != previous.reindex(known.index).values
+
+    added = df[df[KEY].isin(hashes.index[is_new])]
+    changed = df[df[KEY].isin(known.index[is_changed])]
+    removed = previous.index.difference(hashes.index)
+
+    return added, changed, removed, hashes
+
+
+def to_upload(df, batch, op='upsert'):
+    """
+    Formats rows in the layout of the uploaded base and delta files.
+    Every row carries the batch it was uploaded in, so the latest
+    version of a movie is the row with the highest batch.
+
+    Arguments:
+        - df: dataframe of movies
+        - batch: batch number of the upload
+        - op: either 'upsert' or 'delete'. Default set to 'upsert'.
+
+    Returns:
+        Dataframe with the compared columns, batch and op
+    """
+
+    df = df.reindex(columns=COLUMNS).copy()
+    for column in INT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+
+    df['batch'] = batch
+    df['op'] = op
+    return df.astype(UPLOAD_DTYPES)
+
+
+def new_batch():
+    """
+    Returns batch number based on the current UTC time, which keeps
+    increasing between runs without any stored counter
+    """
+
+    return int(time.strftime('%Y%m%d%H%M%S', time.gmtime()))
+
+
+class SnapshotState:
+    """
+    Row hashes of the last uploaded snapshot and the number of
+    delta files uploaded since the last compaction.
+
+    Arguments:
+        directory: folder where the state files are kept.
+                   Default set to ./datasets.
+    """
+
+    def __init__(self, directory='./datasets'):
+        self.hashes_path = os.path.join(directory, 'bechdel_hashes.parquet')
+        self.state_path = os.path.join(directory, 'bechdel_state.json')
+
+    def load(self):
+        """
+        Returns the hashes and the number of deltas since compaction.
+        The hashes are empty if there is no previous snapshot, or
+        if either of its files is missing.
+        """
+
+        #a crash between the two writes of save leaves only one half
+        empty = pd.Series(dtype='uint64')
+        if not os.path.exists(self.hashes_path) \
+           or not os.path.exists(self.state_path):
+            return empty, 0
+
+        with open(self.state_path) as file:
+            state = json.load(file)
+
+        if state.get('format') != UPLOAD_FORMAT:
+            return empty, 0
+
+        df = pd.read_parquet(self.hashes_path)
+        hashes = pd.Series(df['hash'].values, index=df[KEY].values)
+
+        return hashes, state['deltas']
+
+    def save(self, hashes, deltas):
+        df = pd.DataFrame({KEY: hashes.index, 'hash': hashes.values})
+        df.to_parquet(f'{self.hashes_path}.tmp', index=False)
+        os.replace(f'{self.hashes_path}.tmp', self.hashes_path)
+
+        with open(f'{self.state_path}.tmp', 'w') as file:
+            json.dump({'deltas': deltas, 'format': UPLOAD_FORMAT}, file)
+        os.replace(f'{self.state_path}.tmp', self.state_path)
@@ -3,7 +3,7 @@ Final set pf Prefect workflows that will serve as the basis for the
 Prefect deployments to be created in create_prefect_deployments.py. This
 reads the primary flow functions from the etl and dbt directories.
 
-Last modified: April 2023
+Last modified: October 2026
 ----------------------------------------------------------------------"""
 
 import pandas as pd
@@ -15,7 +15,9 @@ sys.path.extend(["./etl","./dbt"])
 
 from gcs_to_bigquery import etl_load_to_bq
 from trigger_dbt_prefect import trigger_dbt
-from source_to_gcs import etl_load_to_gcs, imdb_data_flow, df_to_gcs
+from source_to_gcs import etl_load_to_gcs, imdb_data_flow, df_to_gcs, \
+                          bechdel_data_flow
+from http_transport import open_stream
 
 bucket_name = "bechdel-project_data-lake"
 
@@ -40,8 +42,8 @@ def etl_full_flow(gcs_block_name = "bechdel-project-gcs",
         None
     """
 
-    etl_load_to_gcs(gcs_block_name)
-    etl_load_to_bq(bq_block_name, dataset, bucket_name)
+    changed = etl_load_to_gcs(gcs_block_name)
+    etl_load_to_bq(bq_block_name, dataset, bucket_name, changed)
 
 
 @flow(name="source-to-gcs-alt")
@@ -66,15 +68,14 @@ def etl_load_to_gcs_alt(block_name = 'bechdel-project-gcs'):
     from_path = f'{url}/oscars_awards.csv'
     to_path = Path("oscars/oscars_awards.csv")
 
-    df = pd.read_csv(from_path)
+    df = pd.read_csv(open_stream(from_path))
     df_to_gcs(df, to_path, 'csv', block_name)
 
-    # upload bechdel test movies data
+    # upload changes in bechdel test movies data
     from_path = f'{url}/bechdel_test_movies.csv'
-    to_path = Path("bechdel/bechdel_test_movies.csv")
 
-    df = pd.read_csv(from_path)
-    df_to_gcs(df, to_path, 'csv', block_name)
+    df = pd.read_csv(open_stream(from_path))
+    bechdel_data_flow(block_name, df)
 
     # get and upload imdb datasets in chunks
     imdb_data_flow(block_name)  
@@ -1,17 +1,19 @@
 """----------------------------------------------------------------------
 Script for loading data files from GCS to BigQuery using Prefect
 
-Last modified: April 2023
+Last modified: October 2026
 ----------------------------------------------------------------------"""
 
 from prefect import task, flow
 from prefect_gcp.bigquery import BigQueryWarehouse
+from imdb_layout import PARTITIONS, table_name
 
 bucket_name = "bechdel-project_data-lake"
 
 
 @task(log_prints=True)
-def gcs_to_bigquery(block_name, dataset, table, uri, format):
+def gcs_to_bigquery(block_name, dataset, table, uri, format,
+                    partition_columns=None, uri_prefix=None):
     """
     Loads raw data from GCS to BigQuery in an external table.
     This executes a SQL query in the data warehouse.
@@ -22,6 +24,11 @@ def gcs_to_bigquery(block_name, dataset, table, uri, format):
         - table: name of the BigQuery table to be created
         - uri: GCS file path, e.g. "gs://bucket-name/..."
         - format: file format of the files to be read
+        - partition_columns: hive partition keys and their BigQuery
+                             types, e.g. "start_year INT64". Default
+                             set to None for files without partitions.
+        - uri_prefix: GCS path where the hive partitions start,
+                      required with partition_columns
     
     Returns:
         BigQuery block info
@@ -29,10 +36,22 @@ def gcs_to_bigquery(block_name, dataset, table, uri, format):
 
     warehouse = BigQueryWarehouse.load(block_name)
 
+    #queries filtering on the keys only read matching partitions
+    partitions, hive_options = "", ""
+    if partition_columns is not None:
+        partitions = f"WITH PARTITION COLUMNS ({partition_columns})"
+        hive_options = f"hive_partition_uri_prefix = '{uri_prefix}',"
+
+    #Parquet list columns are read as arrays, not as nested structs
+    if format == "parquet":
+        hive_options += "\n                enable_list_inference = true,"
+
     query = f"""
             CREATE OR REPLACE EXTERNAL TABLE {dataset}.{table}
+            {partitions}
             OPTIONS (
                 format = {format},
+                {hive_options}
                 uris = {uri}
             );
             """
@@ -43,7 +62,7 @@ def gcs_to_bigquery(block_name, dataset, table, uri, format):
 
 
 @flow(name="IMDB-load-BQ", log_prints=True)
-def gcs_imdb_to_bq(block_name, bucket_name, dataset, format):
+def gcs_imdb_to_bq(block_name, bucket_name, dataset, format, changed=None):
     """
     Subflow to load IMDB parquet files from GCS to BigQuery
 
@@ -52,11 +71,16 @@ def gcs_imdb_to_bq(block_name, bucket_name, dataset, format):
         - bucket_name: GCS bucket name where data is stored
         - dataset: name of the BigQuery dataset
         - format: file format of the files to be read
+        - changed: dictionary of table name and whether its data
+                   changed. Default set to None which will load all.
     
     Returns:
         None
     """
 
+    if changed is None:
+        changed = {}
+
     imdb_files = ['title.basics.tsv.gz',
                   'title.principals.tsv.gz',
                   'title.crew.tsv.gz',
@@ -64,15 +88,22 @@ def gcs_imdb_to_bq(block_name, bucket_name, dataset, format):
                   'name.basics.tsv.gz']
 
     for filename in imdb_files:
-        filename = "_".join(filename.split(".")[:2])
-        uri = [f"gs://{bucket_name}/imdb/{filename}/*.{format}"]
+        key = PARTITIONS[filename][0]
+        filename = table_name(filename)
+        if not changed.get(f"imdb_{filename}", True):
+            continue
+
+        prefix = f"gs://{bucket_name}/imdb/{filename}"
+        uri = [f"{prefix}/*.{format}"]
 
         #load to BigQuery
         gcs_to_bigquery(block_name = block_name,
                         dataset = dataset,
                         table = f"imdb_{filename}",
                         uri = uri,
-                        format = format)
+                        format = format,
+                        partition_columns = f"{key} INT64",
+                        uri_prefix = prefix)
         
 
 @task(log_prints=True)
@@ -109,7 +140,8 @@ def bq_tables_action(dataset, table, action, block_name):
 @flow(name="gcs-to-bigquery")
 def etl_load_to_bq(block_name = "bechdel-project-bigquery", 
                    dataset = "bechdel_movies_project", 
-                   bucket_name = bucket_name):
+                   bucket_name = bucket_name,
+                   changed = None):
     """
     Primary workflow which includes loading data from GCS
     to BigQuery. It also includes creating partitioned
@@ -120,43 +152,55 @@ def etl_load_to_bq(block_name = "bechdel-project-bigquery",
         - dataset: name of the BigQuery dataset
         - bucket_name: name of the GCS bucket where raw the
                        data is stored
+        - changed: dictionary of source name and whether its
+                   data changed, as returned by etl_load_to_gcs.
+                   Default set to None which will rebuild all tables.
 
     Returns:
         None
     """
-    
+
+    if changed is None:
+        changed = {}
+
     # read and load oscars data to bigquery
-    uri = [f"gs://{bucket_name}/oscars/*.csv"]
-    gcs_to_bigquery(block_name = block_name,
-                    dataset = dataset,
-                    table = "oscars",
-                    uri = uri,
-                    format = "csv")
+    if changed.get('oscars', True):
+        uri = [f"gs://{bucket_name}/oscars/*.csv"]
+        gcs_to_bigquery(block_name = block_name,
+                        dataset = dataset,
+                        table = "oscars",
+                        uri = uri,
+                        format = "csv")
     
-    # read and load Bechdel Test movie list
-    uri = [f"gs://{bucket_name}/bechdel/*.csv"]
-    gcs_to_bigquery(block_name = block_name,
-                    dataset = dataset,
-                    table = "bechdel",
-                    uri = uri,
-                    format = "csv")
+    # read and load Bechdel Test movie list from base and deltas
+    if changed.get('bechdel', True):
+        uri = [f"gs://{bucket_name}/bechdel/base/*.parquet",
+               f"gs://{bucket_name}/bechdel/delta/*.parquet"]
+        gcs_to_bigquery(block_name = block_name,
+                        dataset = dataset,
+                        table = "bechdel",
+                        uri = uri,
+                        format = "parquet")
     
     # read and load IMDB movie data
     gcs_imdb_to_bq(block_name = block_name, 
                    bucket_name =  bucket_name, 
                    dataset = dataset, 
-                   format = "parquet")
+                   format = "parquet",
+                   changed = changed)
 
     """---------------------------------------------"""
 
     # create new table with partition for imdb data
-    action = """PARTITION BY DATE(startYear) 
-                CLUSTER BY titleType"""
-    bq_tables_action(dataset, "imdb_title_basics", action, block_name)
+    if changed.get("imdb_title_basics", True):
+        action = """PARTITION BY RANGE_BUCKET(startYear, GENERATE_ARRAY(1870, 2101, 1))
+                    CLUSTER BY titleType"""
+        bq_tables_action(dataset, "imdb_title_basics", action, block_name)
 
     #create new table with cluster for the following data
-    action = "CLUSTER BY AwardCeremonyNum"
-    bq_tables_action(dataset, "oscars", action, block_name)
+    if changed.get('oscars', True):
+        action = "CLUSTER BY AwardCeremonyNum"
+        bq_tables_action(dataset, "oscars", action, block_name)
     
 
 if __name__=="__main__":
@@ -0,0 +1,195 @@
+"""----------------------------------------------------------------------
+PyArrow engine for the IMDB datasets. The gzip'd TSV files are decoded
+by Arrow's multithreaded streaming CSV reader with the column types of
+the schema registry and \\N as null, converted with Arrow compute kernels
+and written to Parquet without going through pandas. The list kernels
+are also used by the pandas engine.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import io
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from imdb_schema import NUMERIC_TYPES, arrow_types, key_columns, \
+                        list_columns, numeric_columns
+
+#text of the values which can be converted to each kind of number
+NUMBER_PATTERNS = {
+    'int': r'^[+-]?[0-9]{1,18}$',
+    'float': r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$',
+}
+
+
+def open_imdb_reader(path, filename, block_size=16*1024**2):
+    """
+    Opens a streaming reader over a gzip'd IMDB TSV file.
+
+    Arguments:
+        - path: local path of the IMDB dataset
+        - filename: name of the IMDB dataset in the schema registry
+        - block_size: bytes of uncompressed text decoded per batch.
+                      Default set to 16 MB.
+
+    Returns:
+        pyarrow CSVStreamingReader of record batches
+    """
+
+    read_options = pacsv.ReadOptions(block_size=block_size, use_threads=True)
+
+    #IMDB does not quote values, titles may contain lone quotes
+    parse_options = pacsv.ParseOptions(delimiter='\t', quote_char=False,
+                                       double_quote=False)
+
+    convert_options = pacsv.ConvertOptions(
+                        column_types=arrow_types(filename),
+                        null_values=['\\N'],
+                        strings_can_be_null=True)
+
+    return pacsv.open_csv(pa.input_stream(path, compression='gzip'),
+                          read_options=read_options,
+                          parse_options=parse_options,
+                          convert_options=convert_options)
+
+
+def read_imdb_arrow(path, filename, memory_budget=256*1024**2):
+    """
+    Reads an IMDB dataset as Arrow tables of about memory_budget bytes.
+    Record batches are collected until their measured size reaches
+    the budget, so wide and narrow files get the same chunk memory.
+
+    Arguments:
+        - path: local path of the IMDB dataset
+        - filename: name of the IMDB dataset in the schema registry
+        - memory_budget: target memory per table in bytes.
+                         Default set to 256 MB.
+
+    Returns:
+        generator of pyarrow Tables
+    """
+
+    batches = []
+    nbytes = 0
+
+    #decoded blocks stay well under the budget
+    block_size = max(1024**2, min(16*1024**2, memory_budget // 4))
+
+    for batch in open_imdb_reader(path, filename, block_size):
+        batches.append(batch)
+        nbytes += batch.nbytes
+
+        if nbytes >= memory_budget:
+            yield pa.Table.from_batches(batches)
+            batches, nbytes = [], 0
+
+    if len(batches) > 0:
+        yield pa.Table.from_batches(batches)
+
+
+def split_list(column, kind):
+    """
+    Splits a comma-separated text column into a list column.
+
+    Arguments:
+        - column: pyarrow Array or ChunkedArray of text, e.g. nm01,nm02
+        - kind: 'list' for list<string>, or 'key_list' for list<int32>
+                of tconst/nconst values without their prefix
+
+    Returns:
+        pyarrow ListArray, null where the text is null
+    """
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+
+    lists = pc.split_pattern(column, ',')
+
+    if kind == 'key_list':
+        values = pc.utf8_slice_codeunits(lists.flatten(), 2).cast(pa.int32())
+        lists = pa.ListArray.from_arrays(lists.offsets, values,
+                                         mask=lists.is_null())
+
+    return lists
+
+
+def to_number(column, kind):
+    """
+    Converts a text column to a compact numeric type, turning
+    values which are not numbers, or out of range, into nulls.
+
+    Arguments:
+        - column: pyarrow Array or ChunkedArray of text
+        - kind: numeric kind of the schema registry, e.g. int16
+
+    Returns:
+        pyarrow Array or ChunkedArray of the kind's Arrow type
+    """
+
+    target = NUMERIC_TYPES[kind][1]
+    pattern = NUMBER_PATTERNS['float' if pa.types.is_floating(target) else 'int']
+
+    valid = pc.match_substring_regex(column, pattern)
+    values = pc.if_else(valid, column, pa.scalar(None, pa.string()))
+
+    if pa.types.is_floating(target):
+        return values.cast(pa.float64()).cast(target, safe=False)
+
+    values = values.cast(pa.int64())
+    low, high = -2**(target.bit_width-1), 2**(target.bit_width-1) - 1
+    in_range = pc.and_(pc.greater_equal(values, low), pc.less_equal(values, high))
+    return pc.if_else(in_range, values, pa.scalar(None, pa.int64())).cast(target)
+
+
+def transform_imdb_table(filename, table, scope=None):
+    """
+    Arrow version of transform_imdb_data.
+
+    Arguments:
+        - filename: name of the IMDB dataset in the schema registry
+        - table: pyarrow Table of an IMDB dataset
+        - scope: ImdbScope to only keep the linked rows.
+                 Default set to None for all rows.
+
+    Returns:
+        Transformed pyarrow Table
+    """
+
+    for name in key_columns(filename):
+        column = pc.utf8_slice_codeunits(table.column(name), 2).cast(pa.int32())
+        table = table.set_column(table.column_names.index(name), name, column)
+
+    for name, kind in numeric_columns(filename).items():
+        column = to_number(table.column(name), kind)
+        table = table.set_column(table.column_names.index(name), name, column)
+
+    if scope is not None:
+        table = scope.filter(filename, table)
+
+    for name, kind in list_columns(filename).items():
+        column = split_list(table.column(name), kind)
+        table = table.set_column(table.column_names.index(name), name, column)
+
+    return table
+
+
+def table_to_parquet(table, compression='snappy', **options):
+    """
+    Writes a table into an in-memory Parquet file.
+
+    Arguments:
+        - table: pyarrow Table
+        - compression: Parquet compression codec.
+                       Default set to snappy.
+        - options: other options of pyarrow.parquet.write_table,
+                   e.g. row_group_size or use_dictionary
+
+    Returns:
+        BytesIO of the Parquet file, positioned at the start
+    """
+
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=compression, **options)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,268 @@
+"""----------------------------------------------------------------------
+Change detection for the IMDB datasets. The rows of the last load are
+kept as a compact index of 64-bit row hashes keyed by tconst/nconst,
+so that a new dump can be reduced to the rows inserted, updated or
+deleted since then, in the same way as the Bechdel deltas.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from imdb_schema import SCHEMA_VERSION
+from imdb_layout import row_key_columns, table_name, upload_schema
+
+#bits of the ordering within a composite principals key
+ORDERING_BITS = 16
+
+
+def encode_keys(filename, table):
+    """
+    Combines the row key columns of a table into one int64
+    per row, e.g. tconst and ordering of title.principals
+
+    Returns:
+        numpy array of int64 keys
+    """
+
+    columns = row_key_columns(filename)
+    keys = table.column(columns[0]).to_numpy().astype(np.int64)
+
+    if len(columns) == 2:
+        keys = (keys << ORDERING_BITS) | table.column(columns[1]).to_numpy().astype(np.int64)
+
+    return keys
+
+
+def decode_keys(filename, keys):
+    """
+    Splits encoded keys back into their row key columns
+
+    Returns:
+        dictionary of column name and numpy array
+    """
+
+    columns = row_key_columns(filename)
+    if len(columns) == 2:
+        return {columns[0]: (keys >> ORDERING_BITS).astype(np.int32),
+                columns[1]: (keys & (2**ORDERING_BITS - 1)).astype(np.int16)}
+
+    return {columns[0]: keys.astype(np.int32)}
+
+
+def row_hashes(filename, table):
+    """
+    Computes one 64-bit hash per row over all columns which are
+    not part of the row key, batch or op.
+
+    Arguments:
+        - filename: name of the IMDB dataset
+        - table: pyarrow Table following upload_schema
+
+    Returns:
+        numpy array of uint64 hashes
+    """
+
+    skip = set(row_key_columns(filename)) | {'batch', 'op'}
+    columns = {}
+
+    for name in table.column_names:
+        if name in skip:
+            continue
+
+        #all values are hashed through their text, so that a chunk
+        #with or without nulls gives the same hash for the same row
+        column = table.column(name)
+        if pa.types.is_list(column.type):
+            column = pc.binary_join(column.cast(pa.list_(pa.string())), ',')
+        columns[name] = column.cast(pa.string())
+
+    df = pa.table(columns).to_pandas()
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class ChangeTracker:
+    """
+    Compares the chunks of a file with the hash index of its last
+    load while the chunks are read, and builds the new index.
+    Chunks can be compared from several threads in any order.
+
+    Arguments:
+        - filename: name of the IMDB dataset
+        - previous: hash index of the last load, a dataframe of key,
+                    hash and partition sorted by key, or None
+    """
+
+    def __init__(self, filename, previous=None):
+        if previous is None:
+            previous = pd.DataFrame({'key': np.array([], np.int64),
+                                     'hash': np.array([], np.uint64),
+                                     'partition': np.array([], np.int64)})
+
+        self.filename = filename
+        self.previous = previous
+        self.seen = np.zeros(len(previous), dtype=bool)
+        self.parts = []
+        self.changes = 0
+        self.lock = threading.Lock()
+
+    def compare(self, table, partitions):
+        """
+        Finds the inserted and updated rows of a chunk.
+
+        Arguments:
+            - table: pyarrow Table following upload_schema
+            - partitions: pyarrow Array of the partition of every row
+
+        Returns:
+            boolean numpy array of the changed rows, and dataframe of
+            key and old partition of updated rows whose partition
+            changed, e.g. titles with a corrected start year
+        """
+
+        keys = encode_keys(self.filename, table)
+        hashes = row_hashes(self.filename, table)
+        partitions = partitions.to_numpy()
+
+        if len(self.previous) > 0:
+            known_keys = self.previous['key'].to_numpy()
+            index = np.searchsorted(known_keys, keys)
+            index[index == len(known_keys)] = 0
+            found = known_keys[index] == keys
+
+            changed = ~found | (self.previous['hash'].to_numpy()[index] != hashes)
+            old_partitions = self.previous['partition'].to_numpy()[index]
+            moved = found & (old_partitions != partitions)
+        else:
+            index = np.zeros(len(keys), dtype=np.int64)
+            found = moved = np.zeros(len(keys), dtype=bool)
+            changed = ~found
+            old_partitions = partitions
+
+        with self.lock:
+            self.seen[index[found]] = True
+            self.parts.append(pd.DataFrame({'key': keys, 'hash': hashes,
+                                            'partition': partitions}))
+            self.changes += int((changed | moved).sum())
+
+        return changed, pd.DataFrame({'key': keys[moved],
+                                      'partition': old_partitions[moved]})
+
+    def deleted(self):
+        """
+        Returns dataframe of key and partition of the rows of the
+        last load which were not in any chunk
+        """
+
+        deleted = self.previous.loc[~self.seen, ['key', 'partition']]
+        with self.lock:
+            self.changes += len(deleted)
+        return deleted
+
+    def index(self):
+        """
+        Returns the hash index of all compared chunks, sorted by key
+        """
+
+        if len(self.parts) == 0:
+            return ChangeTracker(self.filename).previous
+
+        index = pd.concat(self.parts, ignore_index=True)
+        return index.sort_values('key', ignore_index=True)
+
+
+def tombstones(filename, deleted, batch):
+    """
+    Builds the rows marking deleted keys.
+
+    Arguments:
+        - filename: name of the IMDB dataset
+        - deleted: dataframe of key and partition
+        - batch: batch number of the upload
+
+    Returns:
+        pyarrow Table following upload_schema with only the row
+        key columns set, and pyarrow Array of their partitions
+    """
+
+    schema = upload_schema(filename)
+    keys = decode_keys(filename, deleted['key'].to_numpy())
+    rows = len(deleted)
+
+    columns = []
+    for field in schema:
+        if field.name in keys:
+            columns.append(pa.array(keys[field.name], field.type))
+        elif field.name == 'batch':
+            columns.append(pa.array(np.full(rows, batch), field.type))
+        elif field.name == 'op':
+            columns.append(pa.array(['delete'] * rows, field.type))
+        else:
+            columns.append(pa.nulls(rows, field.type))
+
+    table = pa.Table.from_arrays(columns, schema=schema)
+    return table, pa.array(deleted['partition'].to_numpy(), pa.int64())
+
+
+class HashIndex:
+    """
+    Row hashes of the last load of every IMDB file, and the number of
+    changesets uploaded since its base files were last rewritten.
+
+    Arguments:
+        directory: folder where the index files are kept.
+                   Default set to ./datasets/imdb_hashes.
+    """
+
+    def __init__(self, directory='./datasets/imdb_hashes'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def paths(self, filename):
+        name = os.path.join(self.directory, table_name(filename))
+        return f'{name}.parquet', f'{name}.json'
+
+    def load(self, filename):
+        """
+        Returns the hash index and the number of changesets since
+        the last base. The index is None if there is no previous
+        load in the current schema.
+        """
+
+        hashes_path, state_path = self.paths(filename)
+        if not os.path.exists(hashes_path) or not os.path.exists(state_path):
+            return None, 0
+
+        with open(state_path) as file:
+            state = json.load(file)
+
+        if state.get('format') != SCHEMA_VERSION:
+            return None, 0
+
+        return pd.read_parquet(hashes_path), state['changesets']
+
+    def save(self, filename, index, changesets):
+        hashes_path, state_path = self.paths(filename)
+
+        index.to_parquet(f'{hashes_path}.tmp', index=False)
+        os.replace(f'{hashes_path}.tmp', hashes_path)
+
+        with open(f'{state_path}.tmp', 'w') as file:
+            json.dump({'changesets': changesets, 'format': SCHEMA_VERSION}, file)
+        os.replace(f'{state_path}.tmp', state_path)
+
+    def invalidate(self, filename):
+        """
+        Forgets the last load of a file, e.g. before its base files
+        are deleted, so an interrupted upload leads to a full base
+        next time instead of a changeset against missing files
+        """
+
+        for path in self.paths(filename):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,232 @@
+"""----------------------------------------------------------------------
+Key sets of the IMDB titles and people linked to the Bechdel and
+Oscars datasets. Chunks are filtered against sorted arrays of tconst
+and nconst with a vectorized membership test, and the keys referenced
+by the rows which survive are kept on disk for the next files.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from imdb_arrow import split_list
+
+#title types which can match the name of an Oscars nominee
+OSCARS_TITLE_TYPES = ['movie', 'short']
+
+#columns deciding whether a row of a file is linked
+SCOPE_COLUMNS = {
+    'title.basics.tsv.gz': ['tconst', 'primaryTitle', 'titleType'],
+    'title.crew.tsv.gz': ['tconst'],
+    'title.ratings.tsv.gz': ['tconst'],
+    'title.principals.tsv.gz': ['tconst'],
+    'name.basics.tsv.gz': ['nconst', 'knownForTitles'],
+}
+
+#columns of the linked rows whose keys are needed by the next files
+LINK_COLUMNS = {
+    'title.basics.tsv.gz': ['tconst'],
+    'title.crew.tsv.gz': ['directors', 'writers'],
+    'title.principals.tsv.gz': ['nconst'],
+}
+
+
+def to_numpy(column):
+    """
+    Converts an Arrow column of keys, or of lists of keys,
+    to a numpy array of int32 without nulls
+    """
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if pa.types.is_list(column.type):
+        column = column.flatten()
+
+    return column.drop_null().to_numpy(zero_copy_only=False).astype(np.int32)
+
+
+class KeySet:
+    """
+    Sorted array of unique tconst or nconst values.
+
+    Arguments:
+        - keys: iterable of integer keys. Values outside of the
+                int32 range, e.g. typos in the Bechdel imdbid, are
+                dropped. Default set to an empty set.
+    """
+
+    def __init__(self, keys=()):
+        keys = np.asarray(keys, dtype=np.int64)
+        keys = keys[(keys >= 0) & (keys <= np.iinfo(np.int32).max)]
+        self.keys = np.unique(keys).astype(np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def isin(self, values):
+        """
+        Returns boolean numpy array of which values are in the set
+        """
+
+        values = np.asarray(values)
+        if len(self.keys) == 0:
+            return np.zeros(len(values), dtype=bool)
+
+        index = np.searchsorted(self.keys, values)
+        index[index == len(self.keys)] = 0
+        return self.keys[index] == values
+
+    def union(self, other):
+        return KeySet(np.concatenate([self.keys, other.keys]))
+
+    def digest(self):
+        return hashlib.sha256(self.keys.tobytes()).hexdigest()[:16]
+
+
+class ImdbScope:
+    """
+    Decides which rows of the IMDB files are linked to the
+    Bechdel and Oscars datasets. Sent with every chunk to the
+    worker processes, so it only holds compact arrays.
+
+    Arguments:
+        - titles: KeySet of the linked tconst
+        - names: KeySet of the linked nconst. Default set to an
+                 empty set.
+        - oscars_titles: names of Oscars nominated films, matched
+                         against primaryTitle. Default set to none.
+    """
+
+    def __init__(self, titles, names=None, oscars_titles=()):
+        self.titles = titles
+        self.names = names if names is not None else KeySet()
+        self.oscars_titles = pa.array(sorted(set(oscars_titles)), pa.string())
+
+    def digest(self):
+        """
+        Returns short hash of the scope, which changes whenever
+        other rows would be linked
+        """
+
+        sha256 = hashlib.sha256()
+        for part in [self.titles.digest(), self.names.digest(),
+                     *self.oscars_titles.to_pylist()]:
+            sha256.update(part.encode('utf-8') + b'\0')
+        return sha256.hexdigest()[:16]
+
+    def mask(self, filename, table):
+        """
+        Finds the linked rows of a chunk.
+
+        Arguments:
+            - filename: name of the IMDB dataset in SCOPE_COLUMNS
+            - table: pyarrow Table of the chunk with integer keys
+
+        Returns:
+            boolean numpy array, True for the rows to keep
+        """
+
+        if filename == 'name.basics.tsv.gz':
+            mask = self.names.isin(table.column('nconst').to_numpy())
+
+            #people known for a linked title, even without a crew credit
+            known = split_list(table.column('knownForTitles'), 'key_list')
+            linked = self.titles.isin(to_numpy(known))
+            rows = pc.list_parent_indices(known).to_numpy()[linked]
+            mask[rows] = True
+            return mask
+
+        mask = self.titles.isin(table.column('tconst').to_numpy())
+
+        if filename == 'title.basics.tsv.gz' and len(self.oscars_titles) > 0:
+            title_type = table.column('titleType').cast(pa.string())
+            nominated = pc.and_(pc.is_in(table.column('primaryTitle'), self.oscars_titles),
+                                pc.is_in(title_type, pa.array(OSCARS_TITLE_TYPES)))
+            mask |= nominated.to_numpy(zero_copy_only=False).astype(bool)
+
+        return mask
+
+    def filter(self, filename, chunk):
+        """
+        Keeps the linked rows of a dataframe or pyarrow Table
+        """
+
+        if isinstance(chunk, pd.DataFrame):
+            columns = chunk[SCOPE_COLUMNS[filename]]
+            mask = self.mask(filename, pa.Table.from_pandas(columns, preserve_index=False))
+            return chunk[mask]
+
+        return chunk.filter(pa.array(self.mask(filename, chunk)))
+
+
+class KeyStore:
+    """
+    Folder of the keys referenced by the linked rows of every
+    file, e.g. the nconst of the directors of linked titles.
+    Keys are collected while chunks are uploaded and saved
+    once their file was completely loaded.
+
+    Arguments:
+        - directory: folder of the key files.
+                     Default set to ./datasets/imdb_keys.
+    """
+
+    def __init__(self, directory='./datasets/imdb_keys'):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.collected = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.directory, f"{filename.split('.tsv')[0]}.npy")
+
+    def exists(self, filename):
+        return filename not in LINK_COLUMNS or os.path.exists(self.path(filename))
+
+    def add(self, filename, chunk):
+        """
+        Collects the linked keys of a transformed chunk
+        """
+
+        if filename not in LINK_COLUMNS:
+            return
+
+        if isinstance(chunk, pd.DataFrame):
+            chunk = pa.Table.from_pandas(chunk[LINK_COLUMNS[filename]],
+                                         preserve_index=False)
+
+        keys = [to_numpy(chunk.column(column)) for column in LINK_COLUMNS[filename]]
+        with self.lock:
+            self.collected.setdefault(filename, []).extend(keys)
+
+    def save(self, filename):
+        """
+        Saves the keys collected from a completely loaded file
+        """
+
+        if filename not in LINK_COLUMNS:
+            return
+
+        with self.lock:
+            keys = KeySet(np.concatenate(self.collected.pop(filename, [[]])))
+
+        np.save(f'{self.path(filename)}.tmp.npy', keys.keys)
+        os.replace(f'{self.path(filename)}.tmp.npy', self.path(filename))
+
+    def discard(self, filename):
+        with self.lock:
+            self.collected.pop(filename, None)
+
+    def load(self, *filenames):
+        """
+        Returns KeySet of the saved keys of one or more files
+        """
+
+        keys = [np.load(self.path(filename)) for filename in filenames
+                if os.path.exists(self.path(filename))]
+        return KeySet(np.concatenate(keys) if keys else [])
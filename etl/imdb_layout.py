@@ -0,0 +1,260 @@
+"""----------------------------------------------------------------------
+Hive-partitioned layout of the IMDB datasets in GCS. Chunks of a file
+are split by partition and spooled to local disk while the file is
+read; once the whole file is read, every partition is sorted by key
+and written as a few large Parquet files with sized row groups, e.g.
+imdb/title_basics/start_year=1999/part-00000.parquet.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from imdb_schema import key_columns, output_schema
+from imdb_arrow import table_to_parquet
+
+#hive partition of every file: name of the partition key, column it
+#is computed from and width of its key ranges (None to use the value)
+PARTITIONS = {
+    'title.basics.tsv.gz': ('start_year', 'startYear', None),
+    'title.crew.tsv.gz': ('tconst_range', 'tconst', 10_000_000),
+    'title.ratings.tsv.gz': ('tconst_range', 'tconst', 10_000_000),
+    'title.principals.tsv.gz': ('tconst_range', 'tconst', 1_000_000),
+    'name.basics.tsv.gz': ('nconst_range', 'nconst', 2_000_000),
+}
+
+#columns identifying a row, which is also the order of the rows
+#within a partition. Other files are keyed by their first key.
+ROW_KEYS = {
+    'title.principals.tsv.gz': ['tconst', 'ordering'],
+}
+
+#every uploaded row carries the batch it was uploaded in and whether
+#it is an 'upsert' or the 'delete' of a row of an earlier batch
+CHANGE_FIELDS = [('batch', pa.int64()), ('op', pa.string())]
+
+#partition of titles without a start year
+MISSING_PARTITION = 0
+
+
+def table_name(filename):
+    """
+    Returns name of the GCS folder and BigQuery table
+    of a file, e.g. title_basics for title.basics.tsv.gz
+    """
+
+    return "_".join(filename.split(".")[:2])
+
+
+def row_key_columns(filename):
+    """
+    Returns list of the columns identifying a row of a file
+    """
+
+    return ROW_KEYS.get(filename, key_columns(filename)[:1])
+
+
+def upload_schema(filename):
+    """
+    Returns Arrow schema of the uploaded files of a dataset
+    """
+
+    return pa.schema(list(output_schema(filename)) + CHANGE_FIELDS)
+
+
+def to_table(filename, chunk, batch, op='upsert'):
+    """
+    Converts a transformed chunk to the upload schema.
+
+    Arguments:
+        - filename: name of the IMDB dataset in PARTITIONS
+        - chunk: transformed dataframe or pyarrow Table
+        - batch: batch number of the upload
+        - op: either 'upsert' or 'delete'. Default set to 'upsert'.
+
+    Returns:
+        pyarrow Table following upload_schema
+    """
+
+    schema = output_schema(filename)
+    if isinstance(chunk, pd.DataFrame):
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    else:
+        table = chunk.select(schema.names).cast(schema)
+
+    table = table.append_column('batch', pa.array(np.full(table.num_rows, batch)))
+    return table.append_column('op', pa.array([op] * table.num_rows, pa.string()))
+
+
+def partition_values(filename, table):
+    """
+    Computes the hive partition of every row of a table.
+
+    Arguments:
+        - filename: name of the IMDB dataset in PARTITIONS
+        - table: transformed pyarrow Table of the file
+
+    Returns:
+        pyarrow Array of int64 partition values
+    """
+
+    _, column, width = PARTITIONS[filename]
+    values = table.column(column).cast(pa.int64())
+
+    if width is not None:
+        #lower bound of the key range, e.g. 3000000 for tt3456789
+        values = pc.multiply(pc.divide(values, width), width)
+
+    return pc.fill_null(values, MISSING_PARTITION).combine_chunks()
+
+
+class ImdbLayout:
+    """
+    Writes the transformed chunks of IMDB files in a hive-partitioned
+    layout. Chunks can be added from several threads and in any order.
+
+    Arguments:
+        - directory: local folder where chunks are spooled until their
+                     file is complete. Default set to ./datasets/imdb_layout.
+        - compression: Parquet compression codec. Default set to zstd.
+        - compression_level: level of the codec. Default set to None
+                             which uses the codec's default.
+        - use_dictionary: whether to dictionary-encode columns, or list
+                          of columns to encode. Default set to True.
+        - row_group_bytes: target in-memory size of a row group.
+                           Default set to 128 MB.
+        - file_bytes: target in-memory size of a file, larger
+                      partitions are split. Default set to 1 GB.
+        - prefix: start of the names of the uploaded files, e.g. to
+                  tell changesets from base files. Default set to part.
+    """
+
+    def __init__(self, directory='./datasets/imdb_layout', compression='zstd',
+                 compression_level=None, use_dictionary=True,
+                 row_group_bytes=128*1024**2, file_bytes=1024**3, prefix='part'):
+        self.directory = directory
+        self.prefix = prefix
+        self.compression = compression
+        self.compression_level = compression_level
+        self.use_dictionary = use_dictionary
+        self.row_group_bytes = row_group_bytes
+        self.file_bytes = file_bytes
+        self.lock = threading.Lock()
+
+    def spool(self, filename):
+        return os.path.join(self.directory, table_name(filename))
+
+    def reset(self, filename):
+        """
+        Removes the spooled chunks of an earlier, unfinished load
+        """
+
+        shutil.rmtree(self.spool(filename), ignore_errors=True)
+
+    def write(self, filename, count, table, partitions=None):
+        """
+        Splits a table by partition and spools the parts.
+
+        Arguments:
+            - filename: name of the IMDB dataset in PARTITIONS
+            - count: name of the chunk, unique within the file
+            - table: pyarrow Table following upload_schema
+            - partitions: partition of every row, e.g. of deleted rows.
+                          Default set to None which computes them.
+        """
+
+        if partitions is None:
+            partitions = partition_values(filename, table)
+
+        #sort once by partition so every part is a slice of the table
+        table = table.append_column('__partition', partitions)
+        table = table.sort_by('__partition')
+        counts = pc.value_counts(table.column('__partition')).flatten()
+        table = table.drop_columns(['__partition'])
+
+        offset = 0
+        for value, length in zip(counts[0].to_pylist(), counts[1].to_pylist()):
+            folder = os.path.join(self.spool(filename), str(value))
+            with self.lock:
+                os.makedirs(folder, exist_ok=True)
+
+            #spooled parts are read back once, so speed matters more than size
+            pq.write_table(table.slice(offset, length),
+                           os.path.join(folder, f'{count}.parquet'),
+                           compression='lz4')
+            offset += length
+
+    def partitions(self, filename):
+        """
+        Returns sorted list of the spooled partition values of a file
+        """
+
+        if not os.path.exists(self.spool(filename)):
+            return []
+        return sorted(int(value) for value in os.listdir(self.spool(filename)))
+
+    def build(self, filename, value):
+        """
+        Sorts a spooled partition and encodes its final Parquet files.
+
+        Returns:
+            list of GCS paths and BytesIO of the Parquet files
+        """
+
+        key, _, _ = PARTITIONS[filename]
+        folder = os.path.join(self.spool(filename), str(value))
+        table = pq.read_table(folder, schema=upload_schema(filename))
+        table = table.sort_by([(column, 'ascending')
+                               for column in row_key_columns(filename)])
+
+        bytes_per_row = max(1, table.nbytes // max(1, table.num_rows))
+        row_group_size = max(1, self.row_group_bytes // bytes_per_row)
+        file_rows = max(row_group_size, self.file_bytes // bytes_per_row)
+
+        files = []
+        for index, offset in enumerate(range(0, table.num_rows, file_rows)):
+            path = (f"imdb/{table_name(filename)}/{key}={value}/"
+                    f"{self.prefix}-{index:05}.parquet")
+            buffer = table_to_parquet(table.slice(offset, file_rows),
+                                      compression=self.compression,
+                                      compression_level=self.compression_level,
+                                      use_dictionary=self.use_dictionary,
+                                      row_group_size=row_group_size)
+            files.append((path, buffer))
+
+        return files
+
+    def publish(self, filename, upload, workers=4):
+        """
+        Uploads all partitions of a completely spooled file and
+        removes its spooled chunks.
+
+        Arguments:
+            - filename: name of the IMDB dataset in PARTITIONS
+            - upload: function called with the GCS path and BytesIO
+                      of every Parquet file
+            - workers: number of partitions built and uploaded at
+                       the same time. Default set to 4.
+
+        Returns:
+            number of uploaded files
+        """
+
+        def publish_partition(value):
+            files = self.build(filename, value)
+            for path, buffer in files:
+                upload(path, buffer)
+            return len(files)
+
+        with ThreadPoolExecutor(workers) as executor:
+            uploaded = sum(executor.map(publish_partition, self.partitions(filename)))
+
+        self.reset(filename)
+        return uploaded
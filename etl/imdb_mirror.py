@@ -0,0 +1,277 @@
+"""----------------------------------------------------------------------
+Local mirror of the IMDB dataset files. Files are only downloaded again
+if IMDB republished them (ETag/If-Modified-Since), interrupted downloads
+are resumed with range requests, and every completed file is verified
+and fingerprinted so that unchanged files can be skipped downstream.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import threading
+import requests
+import urllib3
+from http_transport import get_session
+
+IMDB_URL = 'https://datasets.imdbws.com'
+
+FINGERPRINTS = '_fingerprints.json'
+
+#single-part S3 uploads use the MD5 of the file as ETag
+MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+
+def file_digests(path, verify_gzip=True, chunk_size=1024**2):
+    """
+    Computes the checksums of a file and, if asked, reads it
+    through gzip so a truncated or corrupt file is detected.
+
+    Arguments:
+        - path: location of the file
+        - verify_gzip: whether to decompress the whole file.
+                       Default set to True.
+        - chunk_size: number of bytes read at a time
+
+    Returns:
+        dictionary of the sha256 and md5 hex digests
+    """
+
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            sha256.update(block)
+            md5.update(block)
+
+    #gzip raises on bad CRC, length or an unexpected end of file
+    if verify_gzip:
+        with gzip.open(path, 'rb') as file:
+            while file.read(chunk_size):
+                pass
+
+    return {'sha256': sha256.hexdigest(), 'md5': md5.hexdigest()}
+
+
+class ImdbMirror:
+    """
+    Folder of downloaded IMDB files plus a json file of their
+    fingerprints: validators of the server, size, checksums and
+    the checksum of the last copy processed by the flow.
+
+    Arguments:
+        - directory: folder of the mirror. Default set to ./datasets/imdb.
+        - base_url: where the files are downloaded from. Can also be
+                    a local folder, e.g. with test files.
+                    Default set to https://datasets.imdbws.com.
+        - retries: number of times an interrupted download is resumed.
+                   Default set to 5.
+        - verify_gzip: whether to decompress every downloaded file once
+                       to check it. Default set to True.
+    """
+
+    def __init__(self, directory='./datasets/imdb', base_url=IMDB_URL,
+                 retries=5, verify_gzip=True):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/')
+        self.retries = retries
+        self.verify_gzip = verify_gzip
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def fingerprints(self):
+        path = os.path.join(self.directory, FINGERPRINTS)
+        if not os.path.exists(path):
+            return {}
+
+        with open(path) as file:
+            return json.load(file)
+
+    def update_fingerprint(self, filename, **values):
+        """
+        Updates the stored fingerprint of a file
+        """
+
+        path = os.path.join(self.directory, FINGERPRINTS)
+        with self.lock:
+            fingerprints = self.fingerprints()
+            fingerprints.setdefault(filename, {}).update(values)
+
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(fingerprints, file, indent=2)
+            os.replace(f'{path}.tmp', path)
+
+    def sync(self, filename, tag=''):
+        """
+        Brings the local copy of a file up to date.
+
+        Arguments:
+            - filename: name of the IMDB file, e.g. title.basics.tsv.gz
+            - tag: version of the processing, e.g. of the uploaded 
+                   schema. A copy processed with another tag counts 
+                   as changed. Default set to an empty string.
+
+        Returns:
+            local path of the file, and whether its content or tag 
+            differs from the last copy marked as processed
+        """
+
+        if self.base_url.startswith(('http://', 'https://')):
+            self.download(filename)
+        else:
+            self.copy(filename)
+
+        fingerprint = self.fingerprints()[filename]
+        processed = f"{fingerprint['sha256']}:{tag}"
+        return self.path(filename), processed != fingerprint.get('processed')
+
+    def mark_processed(self, filename, tag=''):
+        """
+        Records that the current copy of a file was fully loaded
+        """
+
+        sha256 = self.fingerprints()[filename]['sha256']
+        self.update_fingerprint(filename, processed=f'{sha256}:{tag}')
+
+    def verify(self, filename, part, expected_size=None, etag=None):
+        """
+        Checks a completed download before it replaces the local copy
+
+        Returns:
+            dictionary of the size and checksums of the file
+        """
+
+        size = os.path.getsize(part)
+        if expected_size is not None and size != expected_size:
+            raise ValueError(f"{filename} has {size} bytes, "
+                             f"expected {expected_size}")
+
+        try:
+            digests = file_digests(part, self.verify_gzip)
+        except (OSError, EOFError) as error:
+            raise ValueError(f"{filename} is not a valid gzip file: {error}")
+
+        match = MD5_ETAG.match(etag or '')
+        if match and match.group(1) != digests['md5']:
+            raise ValueError(f"{filename} does not match the MD5 of its ETag")
+
+        return {'size': size, **digests}
+
+    def download(self, filename):
+        """
+        Downloads a file unless the server reports it as unchanged.
+        Interrupted downloads continue where they stopped as long as
+        the file on the server is still the same (If-Range).
+        """
+
+        url = f'{self.base_url}/{filename}'
+        path = self.path(filename)
+        part = f'{path}.part'
+        known = self.fingerprints().get(filename, {})
+        session = get_session()
+
+        for attempt in range(self.retries+1):
+            headers = {}
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            partial = known.get('partial', {})
+            validator = partial.get('etag') or partial.get('last_modified')
+
+            if offset > 0 and validator:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+            elif os.path.exists(path) and 'sha256' in known:
+                if known.get('etag'):
+                    headers['If-None-Match'] = known['etag']
+                if known.get('last_modified'):
+                    headers['If-Modified-Since'] = known['last_modified']
+
+            try:
+                with session.get(url, headers=headers, stream=True) as response:
+                    if response.status_code == 304:
+                        print(f"{filename} not modified")
+                        return
+
+                    #the partial file is already as long as the file
+                    if response.status_code == 416:
+                        os.remove(part)
+                        raise requests.HTTPError(f"Range of {filename} not satisfiable")
+
+                    response.raise_for_status()
+
+                    #a 200 reply to a range request means the file changed
+                    resumed = response.status_code == 206
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+
+                    if resumed:
+                        total = int(response.headers['Content-Range'].split('/')[-1])
+                    else:
+                        length = response.headers.get('Content-Length')
+                        total = int(length) if length else None
+
+                    known['partial'] = {'etag': etag, 'last_modified': last_modified}
+                    self.update_fingerprint(filename, partial=known['partial'])
+
+                    with open(part, 'ab' if resumed else 'wb') as file:
+                        for block in response.raw.stream(1024**2, decode_content=False):
+                            file.write(block)
+
+                if total is not None and os.path.getsize(part) < total:
+                    raise requests.ConnectionError(
+                        f"{filename} ended after {os.path.getsize(part)} of {total} bytes")
+
+                break
+
+            except (requests.RequestException, urllib3.exceptions.HTTPError) as error:
+                if attempt == self.retries:
+                    raise
+                print(f"Download of {filename} interrupted ({error}), resuming")
+                time.sleep(2 ** attempt)
+
+        try:
+            digests = self.verify(filename, part, total, etag)
+        except ValueError:
+            os.remove(part)
+            self.update_fingerprint(filename, partial={})
+            raise
+
+        os.replace(part, path)
+        self.update_fingerprint(filename, etag=etag, last_modified=last_modified,
+                                partial={}, **digests)
+
+        print(f"Downloaded {filename} ({digests['size']} bytes)")
+
+    def copy(self, filename):
+        """
+        Copies a file from a local source folder unless its size
+        and modification time did not change
+        """
+
+        source = os.path.join(self.base_url, filename)
+        stat = os.stat(source)
+        known = self.fingerprints().get(filename, {})
+
+        if os.path.exists(self.path(filename)) and 'sha256' in known \
+           and known.get('source') == [stat.st_size, stat.st_mtime]:
+            print(f"{filename} not modified")
+            return
+
+        part = f'{self.path(filename)}.part'
+        shutil.copyfile(source, part)
+
+        try:
+            digests = self.verify(filename, part, stat.st_size)
+        except ValueError:
+            os.remove(part)
+            raise
+
+        os.replace(part, self.path(filename))
+        self.update_fingerprint(filename, source=[stat.st_size, stat.st_mtime],
+                                **digests)
@@ -0,0 +1,198 @@
+"""----------------------------------------------------------------------
+Bounded read/transform/upload pipeline for the IMDB datasets. Every file
+is read by its own thread, chunks are transformed in a process pool and
+uploaded by a thread pool, while a fixed number of in-flight chunks
+keeps the readers from running ahead of the uploads.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import threading
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def run_pipeline(readers, transform, upload, transform_workers=None,
+                 upload_workers=4, max_in_flight=8):
+    """
+    Transforms and uploads the chunks of several files at once.
+
+    Arguments:
+        - readers: dictionary of file name and iterator of its chunks
+        - transform: picklable function called with the file name and
+                     a chunk, in a worker process
+        - upload: function called with the file name, the chunk number
+                  (starting at 1) and the transformed chunk
+        - transform_workers: number of worker processes. Set to 0 to
+                             transform in the upload threads instead, e.g.
+                             for Arrow kernels which use their own threads.
+                             Default set to None which uses all CPUs.
+        - upload_workers: number of uploads running at the same time.
+                          Default set to 4.
+        - max_in_flight: number of chunks read but not yet uploaded.
+                         Default set to 8.
+
+    Returns:
+        dictionary of file name and number of uploaded chunks for
+        files which fully succeeded, and dictionary of file name and
+        the first error of files which failed
+    """
+
+    slots = threading.BoundedSemaphore(max_in_flight)
+    upload_slots = threading.BoundedSemaphore(upload_workers)
+    lock = threading.Lock()
+
+    pending = {name: [] for name in readers}
+    counts = {name: 0 for name in readers}
+    errors = {}
+
+    #a failed file stops being read, the other files continue
+    def fail(name, error):
+        with lock:
+            errors.setdefault(name, error)
+
+    def finish(name, count, chunk):
+        try:
+            #chunks sent to the process pool arrive as futures
+            if isinstance(chunk, Future):
+                df = chunk.result()
+            else:
+                df = transform(name, chunk)
+
+            with upload_slots:
+                upload(name, count, df)
+        except Exception as error:
+            fail(name, error)
+            raise
+        finally:
+            slots.release()
+
+    def read(name, chunks, transformers, uploaders):
+        chunks = iter(chunks)
+        count = 0
+
+        while True:
+            #take a slot before reading the next chunk, so no more than
+            #max_in_flight chunks are ever held in memory
+            slots.acquire()
+            try:
+                if name in errors:
+                    break
+
+                chunk = next(chunks)
+                if transformers is not None:
+                    chunk = transformers.submit(transform, name, chunk)
+
+                #the slot is released by finish once the chunk is uploaded
+                future = uploaders.submit(finish, name, count+1, chunk)
+            except StopIteration:
+                break
+            except Exception as error:
+                fail(name, error)
+                break
+
+            count += 1
+            pending[name].append(future)
+            counts[name] = count
+
+        slots.release()
+
+    #an upload thread waits for its transform, so every in-flight
+    #chunk needs its own thread to never block the readers
+    if transform_workers == 0:
+        transformers = nullcontext()
+    else:
+        #forking a process with running reader and upload threads can
+        #copy locks held by them, so workers are started fresh
+        transformers = ProcessPoolExecutor(
+                            transform_workers,
+                            mp_context=multiprocessing.get_context('spawn'))
+
+    with transformers as transformers, \
+         ThreadPoolExecutor(max_in_flight) as uploaders:
+
+        threads = [threading.Thread(target=read, name=f'read-{name}',
+                                    args=(name, chunks, transformers, uploaders))
+                   for name, chunks in readers.items()]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for futures in pending.values():
+            for future in futures:
+                future.exception()
+
+    done = {name: count for name, count in counts.items() if name not in errors}
+    return done, errors
+
+
+class ChunkSizer:
+    """
+    Chooses the number of rows per chunk so that every chunk takes
+    about the same amount of memory, whatever the width of the rows.
+    The first chunk is small and used to measure the bytes per row,
+    which is then updated with every chunk read.
+
+    Arguments:
+        - budget: target memory per chunk in bytes. Default set to 256 MB.
+        - initial_rows: number of rows of the first chunk.
+                        Default set to 10,000.
+        - min_rows: smallest number of rows per chunk.
+                    Default set to 1,000.
+        - smoothing: weight of the latest measure in the bytes per row
+                     average. Default set to 0.5.
+    """
+
+    def __init__(self, budget=256*1024**2, initial_rows=10_000,
+                 min_rows=1_000, smoothing=0.5):
+        self.budget = budget
+        self.initial_rows = initial_rows
+        self.min_rows = min_rows
+        self.smoothing = smoothing
+        self.bytes_per_row = None
+
+    @property
+    def rows(self):
+        if self.bytes_per_row is None:
+            return self.initial_rows
+        return max(self.min_rows, int(self.budget / self.bytes_per_row))
+
+    def update(self, rows, nbytes):
+        """
+        Records the measured memory of a chunk
+        """
+
+        if rows == 0:
+            return
+
+        measured = nbytes / rows
+        if self.bytes_per_row is None:
+            self.bytes_per_row = measured
+        else:
+            self.bytes_per_row += self.smoothing * (measured - self.bytes_per_row)
+
+
+def iter_sized_chunks(reader, sizer):
+    """
+    Reads dataframe chunks sized by a ChunkSizer.
+
+    Arguments:
+        - reader: pandas TextFileReader opened with iterator=True
+        - sizer: ChunkSizer of the file
+
+    Returns:
+        generator of dataframes
+    """
+
+    with reader:
+        while True:
+            try:
+                df = reader.get_chunk(sizer.rows)
+            except StopIteration:
+                return
+
+            sizer.update(len(df), df.memory_usage(deep=True).sum())
+            yield df
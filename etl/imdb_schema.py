@@ -0,0 +1,138 @@
+"""----------------------------------------------------------------------
+Schema registry of the IMDB datasets. Every column of every file is
+declared once with a compact type, which both the pandas and the Arrow
+engine use at read time so that all chunks of a file share one schema.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import pyarrow as pa
+
+#changes whenever the uploaded schema changes, so that files loaded
+#with an older schema are loaded again even if IMDB did not change them
+SCHEMA_VERSION = '5'
+
+#pandas dtype and Arrow type of every numeric kind of column after
+#reading. Values which are not numbers of the type become null.
+NUMERIC_TYPES = {
+    'int8': ('Int8', pa.int8()),
+    'int16': ('Int16', pa.int16()),
+    'int32': ('Int32', pa.int32()),
+    'float32': ('float32', pa.float32()),
+}
+
+#pandas dtype and Arrow type of every kind of column when read. Keys,
+#lists and numbers are read as text and only parsed by the transform,
+#so that a shifted row of IMDB does not fail the whole file.
+TYPES = {
+    'key': ('string', pa.string()),
+    'list': ('string', pa.string()),
+    'key_list': ('string', pa.string()),
+    'string': ('string', pa.string()),
+    'category': ('category', pa.dictionary(pa.int32(), pa.string())),
+    **{kind: ('string', pa.string()) for kind in NUMERIC_TYPES},
+}
+
+#Arrow type of the columns which the transform changes: keys without
+#their prefix, comma-separated values as lists and numbers
+OUTPUT_TYPES = {
+    'key': pa.int32(),
+    'list': pa.list_(pa.string()),
+    'key_list': pa.list_(pa.int32()),
+    **{kind: types[1] for kind, types in NUMERIC_TYPES.items()},
+}
+
+IMDB_SCHEMAS = {
+    'title.basics.tsv.gz': {
+        'tconst': 'key',
+        'titleType': 'category',
+        'primaryTitle': 'string',
+        'originalTitle': 'string',
+        'isAdult': 'int8',
+        'startYear': 'int16',
+        'endYear': 'int16',
+        'runtimeMinutes': 'int32',
+        'genres': 'list',
+    },
+    'title.crew.tsv.gz': {
+        'tconst': 'key',
+        'directors': 'key_list',
+        'writers': 'key_list',
+    },
+    'title.ratings.tsv.gz': {
+        'tconst': 'key',
+        'averageRating': 'float32',
+        'numVotes': 'int32',
+    },
+    'title.principals.tsv.gz': {
+        'tconst': 'key',
+        'ordering': 'int16',
+        'nconst': 'key',
+        'category': 'category',
+        'job': 'category',
+        'characters': 'string',
+    },
+    'name.basics.tsv.gz': {
+        'nconst': 'key',
+        'primaryName': 'string',
+        'birthYear': 'int16',
+        'deathYear': 'int16',
+        'primaryProfession': 'list',
+        'knownForTitles': 'key_list',
+    },
+}
+
+
+def pandas_dtypes(filename):
+    """
+    Returns dictionary of column and pandas dtype of a file
+    """
+
+    return {column: TYPES[kind][0]
+            for column, kind in IMDB_SCHEMAS[filename].items()}
+
+
+def arrow_types(filename):
+    """
+    Returns dictionary of column and Arrow type of a file
+    """
+
+    return {column: TYPES[kind][1]
+            for column, kind in IMDB_SCHEMAS[filename].items()}
+
+
+def key_columns(filename):
+    """
+    Returns list of tconst/nconst columns of a file
+    """
+
+    return [column for column, kind in IMDB_SCHEMAS[filename].items()
+            if kind == 'key']
+
+
+def numeric_columns(filename):
+    """
+    Returns dictionary of numeric column and kind of a file
+    """
+
+    return {column: kind for column, kind in IMDB_SCHEMAS[filename].items()
+            if kind in NUMERIC_TYPES}
+
+
+def list_columns(filename):
+    """
+    Returns dictionary of comma-separated column and kind
+    of list, 'list' or 'key_list', of a file
+    """
+
+    return {column: kind for column, kind in IMDB_SCHEMAS[filename].items()
+            if kind in ('list', 'key_list')}
+
+
+def output_schema(filename):
+    """
+    Returns Arrow schema of a file after the transform
+    """
+
+    return pa.schema([(column, OUTPUT_TYPES.get(kind, TYPES[kind][1]))
+                      for column, kind in IMDB_SCHEMAS[filename].items()])
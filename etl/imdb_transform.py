@@ -0,0 +1,107 @@
+"""----------------------------------------------------------------------
+Reading and transformations of IMDB dataset chunks with pandas. Kept
+apart from the Prefect flows so that the functions can be sent to
+worker processes.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import csv
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from imdb_schema import NUMERIC_TYPES, pandas_dtypes, key_columns, \
+                        list_columns, numeric_columns
+from imdb_arrow import split_list
+from imdb_pipeline import ChunkSizer, iter_sized_chunks
+
+
+def read_imdb_data(path, filename, memory_budget=256*1024**2):
+    """
+    Reads a gzip'd IMDB TSV file in chunks with the column
+    types of the schema registry.
+
+    Arguments:
+        - path: local path of the IMDB dataset
+        - filename: name of the IMDB dataset, e.g. title.basics.tsv.gz
+        - memory_budget: target memory per chunk in bytes.
+                         Default set to 256 MB.
+
+    Returns:
+        generator of dataframes
+    """
+
+    #read in chunks and add \N as a NULL value
+    #IMDB does not quote values, titles may contain lone quotes
+    reader = pd.read_csv( path,
+                          compression='gzip',
+                          iterator=True,
+                          sep='\t',
+                          header=0,
+                          dtype=pandas_dtypes(filename),
+                          na_values='\\N',
+                          keep_default_na=False,
+                          quoting=csv.QUOTE_NONE,
+                          encoding='utf-8' )
+
+    return iter_sized_chunks(reader, ChunkSizer(memory_budget))
+
+
+def to_number(series, kind):
+    """
+    Converts a text column to a compact numeric dtype, turning
+    values which are not numbers, or out of range, into nulls.
+
+    Arguments:
+        - series: Series of text
+        - kind: numeric kind of the schema registry, e.g. int16
+
+    Returns:
+        Series of the kind's pandas dtype
+    """
+
+    dtype = NUMERIC_TYPES[kind][0]
+    values = pd.to_numeric(series, errors='coerce')
+
+    if kind.startswith('int'):
+        info = np.iinfo(kind)
+        values = values.where((values >= info.min) & (values <= info.max)
+                              & (values % 1 == 0))
+
+    return values.astype(dtype)
+
+
+def transform_imdb_data(filename, df, scope=None):
+    """
+    Turns the tconst/nconst keys of an IMDB chunk into integers
+    for easier merging with the Bechdel dataset, and splits the
+    comma-separated columns into lists, e.g. knownForTitles into
+    a list of integer tconst. Numeric columns are converted to
+    their types of the schema registry, bad values become null.
+
+    Arguments:
+        - filename: name of the IMDB dataset, e.g. title.basics.tsv.gz
+        - df: the IMDB dataframe
+        - scope: ImdbScope to only keep the rows linked to the Bechdel
+                 and Oscars datasets. Default set to None for all rows.
+
+    Returns:
+        Transformed IMDB dataframe
+    """
+
+    for column in key_columns(filename):
+        df[column] = df[column].str.slice(2).astype('int32')
+
+    for column, kind in numeric_columns(filename).items():
+        df[column] = to_number(df[column], kind)
+
+    #unlinked rows are dropped before the lists are split
+    if scope is not None:
+        df = scope.filter(filename, df).copy()
+
+    #lists are kept as Arrow arrays, pandas has no list dtype
+    for column, kind in list_columns(filename).items():
+        lists = split_list(pa.array(df[column], pa.string()), kind)
+        df[column] = pd.Series(pd.arrays.ArrowExtensionArray(lists), index=df.index)
+
+    return df
@@ -1,20 +1,31 @@
 """----------------------------------------------------------------------
 Script for loading dataframes from the source to Google Cloud Storage
 
-Last modified: April 2023
+Last modified: October 2026
 ----------------------------------------------------------------------"""
 
-import io
-import time
-import requests
+import os
 import pandas as pd
 from pathlib import Path
+from functools import partial
 from prefect import task, flow
 from prefect_gcp.cloud_storage import GcsBucket
 
 import sys
 sys.path.append("./scraper")
 from scrape_oscars_db import *
+from oscars_store import PageStore
+from bechdel_delta import KEY, SnapshotState, diff_snapshot, to_upload, new_batch
+from bechdel_decoder import write_bechdel_parquet
+from imdb_mirror import ImdbMirror, IMDB_URL
+from imdb_schema import SCHEMA_VERSION
+from imdb_transform import transform_imdb_data, read_imdb_data
+from imdb_arrow import read_imdb_arrow, transform_imdb_table
+from imdb_layout import ImdbLayout, table_name, to_table, partition_values
+from imdb_changes import ChangeTracker, HashIndex, tombstones
+from imdb_keys import KeySet, ImdbScope, KeyStore
+from imdb_pipeline import run_pipeline
+from http_transport import open_stream, get_stats
 
 
 @task(log_prints=True, description="Upload dataframe to GCS")
@@ -34,32 +45,50 @@ def df_to_gcs(df, path, format, block_name):
 
 
 @task(log_prints=True, retries=3, description="Get Oscars data")
-def get_oscars_data():
+def get_oscars_data(fetch_mode='http', store_dir='./datasets/oscars_pages'):
     """
-    Uses the two functions found in scrape_oscars_db to
-    interact with the Oscars database, extract needed
-    elements and format results into a dataframe.
+    Uses the functions found in scrape_oscars_db to get the
+    results pages of the Oscars database. Pages are kept in a
+    content-addressed store and only parsed into a dataframe 
+    if they differ from the last uploaded snapshot.
+
+    Arguments:
+        - fetch_mode: 'http' to post the search request directly,
+                      with Selenium as fallback, or 'selenium' to 
+                      always use the browser. Default set to 'http'.
+        - store_dir: folder of the raw page store.
+                     Default set to ./datasets/oscars_pages.
+
+    Returns:
+        Dataframe of award results, or None if nothing changed,
+        and the page digests of the snapshot
     """
 
-    # interact with database and get page source
-    page_source = scrape_oscars_data()
+    # get results pages and store them by content hash
+    store = PageStore(store_dir)
+    digests = [store.add(page) for page in scrape_oscars_pages(fetch_mode)]
     print("DONE: Scraped Oscars data")
 
-    # extract necessary elements into a dataframe
-    df = extract_oscar_results(page_source)
+    if store.is_published(digests):
+        print("Oscars results unchanged since last upload")
+        return None, digests
+
+    df = store.results(digests)
     print("DONE: Extracted needed elements from HTML")
 
     # save csv file to datasets folder for reference
     df.to_csv("./datasets/oscars.csv", index=False)
 
-    return df
+    return df, digests
 
 
 @task(log_prints=True, description="Get Bechdel data")
 def get_bechdel_data():
     """
     Uses the bechdeltest.com API to collect the list of
-    movies with and their Bechdel score.
+    movies with and their Bechdel score. The response is
+    decoded while it is downloaded and written straight
+    to a typed Parquet file.
 
     Arguments: 
         None
@@ -69,163 +98,408 @@ def get_bechdel_data():
     """
 
     url = 'http://bechdeltest.com/api/v1/getAllMovies'
-    html = requests.get(url).content
-    df = pd.read_json(io.StringIO(html.decode('utf-8')))
+    path = "./datasets/bechdel.parquet"
 
-    # save csv file to datasets folder for reference
-    df.to_csv("./datasets/bechdel.csv", index=False)
+    # save parquet file to datasets folder for reference
+    rows = write_bechdel_parquet(open_stream(url), path)
+    print(f"DONE: Decoded {rows} Bechdel movies")
     
-    return df
+    return pd.read_parquet(path, dtype_backend="numpy_nullable")
 
 
-@task(log_prints=True, description="Get IMDB data")
-def get_imdb_data(imdb_files: dict):
+@task(log_prints=True, description="Delete files in GCS folder")
+def clear_gcs_folder(folder, block_name, keep=None):
     """
-    Reads movie datasets in chunks from IMDB's site:
-    https://datasets.imdbws.com/.
+    Deletes the files under a folder of the storage bucket
 
-    The following are the datasets that will be loaded:
-        - title.basics.tsv.gz
-        - title.principals.tsv.gz
-        - title.crew.tsv.gz
-        - title.ratings.tsv.gz
-        - name.basics.tsv.gz
+    Arguments:
+        - folder: storage bucket folder
+        - block_name: name of the Prefect block for gcs
+        - keep: function called with the name of every file, which
+                returns True for the files to keep. Default set to
+                None which deletes all files.
+    """
+
+    gcs_block = GcsBucket.load(block_name)
+    for blob in gcs_block.list_blobs(folder):
+        if keep is None or not keep(blob.name):
+            blob.delete()
+
+
+@flow(name="Bechdel-data-ingestion", log_prints=True)
+def bechdel_data_flow(block_name, df=None, compact_every=12, compact_ratio=0.1):
+    """
+    Subflow which uploads only the Bechdel movies added, changed
+    or removed since the last run as a delta file. The full list
+    is uploaded again as the base file, and older deltas deleted,
+    after compact_every deltas or when the changes are too large.
 
     Arguments:
-        imdb_files: dictionary object containing the IMDB 
-                    dataset as key (str) and the chunksize 
-                    to be followed as its value (int)
-                    Example:
-                    imdb_files = {
-                        'title.basics.tsv.gz': 50_000
-                    }
-    
+        - block_name: name of Prefect block for GCS bucket
+        - df: dataframe of the Bechdel movie list. Default set to
+              None which will get it from the API.
+        - compact_every: number of delta files kept before the base
+                         is compacted. Default set to 12.
+        - compact_ratio: share of changed movies above which the base 
+                         is compacted right away. Default set to 0.1.
+
     Returns:
-        Dataframe of IMDB movie data in chunks
+        whether any change was uploaded
     """
 
-    collection = []
-    
-    #main loop for reading and loading file
-    for filename, chunksize in imdb_files.items():
-        url = f'https://datasets.imdbws.com/{filename}'
-        
-        #read in chunks and add \N as a NULL value
-        data = pd.read_csv( url,
-                            chunksize=chunksize,
-                            iterator=True,
-                            sep='\t',
-                            header=0,
-                            na_values='\\N',
-                            encoding='utf-8' )  
-        
-        collection.append(data) 
-
-    return collection  
-
-
-@task(log_prints=True, description="Transform dataframe")
-def transform_imdb_data(df):
+    if df is None:
+        df = get_bechdel_data()
+
+    state = SnapshotState()
+    previous, deltas = state.load()
+    batch = new_batch()
+
+    added, changed, removed, hashes = diff_snapshot(previous, df)
+    print(f"Bechdel movies: {len(added)} added, {len(changed)} changed, "
+          f"{len(removed)} removed")
+
+    delta = pd.concat([to_upload(added, batch),
+                       to_upload(changed, batch),
+                       to_upload(pd.DataFrame({KEY: removed}), batch, 'delete')])
+
+    if len(previous) > 0 and len(delta) == 0:
+        print("Bechdel data unchanged since last upload")
+        return False
+
+    if len(previous) == 0 or deltas+1 >= compact_every \
+       or len(delta) > compact_ratio * len(hashes):
+        #the new base already contains all earlier deltas
+        base = to_upload(df.drop_duplicates(KEY, keep='last'), batch)
+        path = Path("bechdel/base/bechdel_base.parquet")
+        df_to_gcs(base, path, 'parquet', block_name)
+        clear_gcs_folder("bechdel/delta", block_name)
+
+        #the external table reads bechdel/delta/*.parquet, which
+        #must match at least one file
+        path = Path(f"bechdel/delta/bechdel_delta_{batch}.parquet")
+        df_to_gcs(base.iloc[0:0], path, 'parquet', block_name)
+        deltas = 0
+        print("DONE: Uploaded compacted Bechdel base")
+
+    else:
+        path = Path(f"bechdel/delta/bechdel_delta_{batch}.parquet")
+        df_to_gcs(delta, path, 'parquet', block_name)
+        deltas += 1
+        print(f"DONE: Uploaded Bechdel delta with {len(delta)} rows")
+
+    state.save(hashes, deltas)
+    return True
+
+
+@task(log_prints=True, retries=3, description="Sync IMDB file")
+def sync_imdb_file(filename, mirror_dir='./datasets/imdb', base_url=IMDB_URL,
+                   tag=SCHEMA_VERSION):
     """
-    Transform the format or change the datatype of
-    some columns in the IMDB dataframe
+    Brings the local mirror of an IMDB dataset up to date. The file is
+    only downloaded if IMDB republished it since the last download.
 
     Arguments:
-        df: the IMDB dataframe
+        - filename: name of the IMDB dataset, e.g. title.basics.tsv.gz
+        - mirror_dir: folder of the local mirror.
+                      Default set to ./datasets/imdb.
+        - base_url: url or local folder where the datasets are read from.
+                    Default set to https://datasets.imdbws.com.
+        - tag: version of the processing, a file loaded with another 
+               tag counts as changed. Default set to SCHEMA_VERSION.
 
     Returns:
-        Transformed IMDB dataframe
+        local path of the file, and whether it changed since it
+        was last loaded
     """
+
+    return ImdbMirror(mirror_dir, base_url).sync(filename, tag)
+
+
+@task(log_prints=True, description="Get titles linked to Bechdel and Oscars")
+def get_linked_scope(bechdel_path='./datasets/bechdel.parquet',
+                     store_dir='./datasets/oscars_pages'):
+    """
+    Collects the IMDB titles needed by the dbt models: the imdbid
+    of the Bechdel movies and the names of the Oscars nominees
+    of the last uploaded snapshot.
+
+    Arguments:
+        - bechdel_path: location of the decoded Bechdel movies.
+                        Default set to ./datasets/bechdel.parquet.
+        - store_dir: folder of the Oscars page store.
+                     Default set to ./datasets/oscars_pages.
+
+    Returns:
+        ImdbScope of the linked titles
+    """
+
+    titles = KeySet(pd.read_parquet(bechdel_path, columns=['imdbid'])['imdbid'].dropna())
+
+    store = PageStore(store_dir)
+    digests = store.published()
+    movies = store.results(digests)['Movie'].dropna() if digests else []
+
+    print(f"Linked {len(titles)} Bechdel titles and {len(set(movies))} Oscars films")
+    return ImdbScope(titles, oscars_titles=movies)
+
+
+@task(log_prints=True, description="Get IMDB data")
+def get_imdb_data(path, filename, memory_budget=256*1024**2):
+    """
+    Reads an IMDB dataset in chunks from its local mirror 
+    of IMDB's site: https://datasets.imdbws.com/. Column
+    types are taken from the schema registry, and the rows 
+    per chunk follow the measured memory of earlier chunks.
+    Numeric columns are read as text and converted by the 
+    transform.
+
+    Arguments:
+        - path: local path of the IMDB dataset
+        - filename: name of the IMDB dataset, e.g. title.basics.tsv.gz
+        - memory_budget: target memory per chunk in bytes.
+                         Default set to 256 MB.
     
-    #columns that should not be a string type
-    columns = ['tconst', 'isAdult', 'endYear', 'startYear',
-               'runtimeMinutes', 'averageRating', 'numVotes', 
-               'birthYear', 'deathYear']    
-    
-    #make sure column dtype is consistent
-    for column in columns:
-        try:
-            if column=='tconst':
-                #make unique key as integer for easier merging
-                #with the Bechdel dataset
-                df[column] = df[column].str\
-                                       .replace('tt','')\
-                                       .astype(int)    
-            else:    
-                #if row is str, make row NULL
-                df[column] = pd.to_numeric(df[column], 
-                                           errors='coerce')
-            
-            #make sure numeric datatypes are consistent
-            #across all data chunks
-            if column in ['isAdult', 'birthYear', 
-                          'deathYear', 'numVotes']:
-                df[column] = df[column].astype('Int64')
-
-            elif column in ['runtimeMinutes', 'averageRating']:
-                df[column] = df[column].astype(float)
-            
-            #convert year columns to datetime
-            #note that birthYear and deathYear exceeds the time 
-            #range for pd.datetime and throws the following error:
-            #pandas._libs.tslibs.np_datetime.OutOfBoundsDatetime: 
-            #Out of bounds nanosecond timestamp: 1564-01-01 00:00:00
-            if column in ['endYear', 'startYear']:
-                df[column] = pd.to_datetime(df[column],
-                                            format='%Y')                
-        except KeyError:
-            pass
-
-    return df
+    Returns:
+        Dataframe of IMDB movie data in chunks
+    """
+
+    return read_imdb_data(path, filename, memory_budget)
 
 
 @flow(name="IMDB-data-ingestion")
-def imdb_data_flow(block_name):
+def imdb_data_flow(block_name, mirror_dir='./datasets/imdb', base_url=IMDB_URL,
+                   engine='pandas', memory_budget=256*1024**2,
+                   transform_workers=None, upload_workers=4, max_in_flight=8,
+                   layout_dir='./datasets/imdb_layout', compression='zstd',
+                   use_dictionary=True, scope='all', keys_dir='./datasets/imdb_keys',
+                   hashes_dir='./datasets/imdb_hashes', compact_every=12,
+                   compact_ratio=0.1, oscars_dir='./datasets/oscars_pages'):
     """
     Subflow which contains the main IMDB tasks for data
-    ingestion and loading to GCS
+    ingestion and loading to GCS. Datasets which did not
+    change since they were last loaded are skipped, and the
+    changed ones are read and transformed at the same time
+    through a bounded pipeline, then uploaded as hive 
+    partitions once a file was completely read.
+
+    Every row is compared with the row hashes of the last
+    load, and only the inserted, updated and deleted rows are
+    uploaded as changeset files next to the base files. The
+    base files are rewritten after compact_every changesets
+    or when the changes are too large.
+
+    With scope 'linked', only the titles of the Bechdel and
+    Oscars datasets are loaded, in three passes: title.basics,
+    then the crew, ratings and principals of the linked titles,
+    then name.basics of the linked people.
 
     Arguments:
-        block_name: name of Prefect block for GCS bucket
+        - block_name: name of Prefect block for GCS bucket
+        - mirror_dir: folder of the local IMDB mirror.
+                      Default set to ./datasets/imdb.
+        - base_url: url or local folder where the datasets are read 
+                    from. Default set to https://datasets.imdbws.com.
+        - engine: 'pandas' to read and transform chunks as dataframes,
+                  or 'arrow' to use the pyarrow CSV reader and compute
+                  kernels. Default set to 'pandas'.
+        - memory_budget: target memory per chunk in bytes. Chunks are
+                         sized from the measured bytes per row of each
+                         file. Default set to 256 MB.
+        - transform_workers: number of processes transforming chunks of
+                             the pandas engine. Default set to None which 
+                             uses all CPUs.
+        - upload_workers: number of chunks spooled and partitions
+                          uploaded at the same time. Default set to 4.
+        - max_in_flight: number of chunks held in memory at once, so
+                         peak memory is about max_in_flight times the
+                         memory_budget. Default set to 8.
+        - layout_dir: local folder where chunks are spooled by partition.
+                      Default set to ./datasets/imdb_layout.
+        - compression: Parquet compression codec of the uploaded files.
+                       Default set to zstd.
+        - use_dictionary: whether to dictionary-encode the columns of the
+                          uploaded files. Default set to True.
+        - scope: 'all' to load every row, or 'linked' to load only the
+                 titles and people linked to the Bechdel and Oscars
+                 datasets. Default set to 'all'.
+        - keys_dir: folder of the keys of linked rows kept between
+                    passes and runs. Default set to ./datasets/imdb_keys.
+        - hashes_dir: folder of the row hashes of the last load.
+                      Default set to ./datasets/imdb_hashes.
+        - compact_every: number of changesets kept before the base
+                         files are rewritten. Default set to 12.
+        - compact_ratio: share of changed rows above which the base
+                         files are rewritten right away. Default set to 0.1.
+        - oscars_dir: folder of the Oscars page store whose published
+                      results are linked with scope 'linked'.
+                      Default set to ./datasets/oscars_pages.
 
     Returns:
-        None
+        dictionary of IMDB table name and whether it changed
     """
 
-    imdb_files = {
-        'title.basics.tsv.gz': 50_000,
-        'title.crew.tsv.gz': 100_000,
-        'title.ratings.tsv.gz': 100_000,
-        'title.principals.tsv.gz': 200_000,
-        'name.basics.tsv.gz': 50_000
-    }
-
-    imdb_collection = get_imdb_data(imdb_files)
+    changed = {}
+    batch = new_batch()
+    layout = ImdbLayout(layout_dir, compression=compression,
+                        use_dictionary=use_dictionary, prefix=f'part-{batch}')
+    changesets = ImdbLayout(os.path.join(layout_dir, 'changes'),
+                            compression=compression, use_dictionary=use_dictionary,
+                            prefix=f'changes-{batch}')
+    hash_index = HashIndex(hashes_dir)
+    trackers = {}
+    keys = KeyStore(keys_dir)
+    mirror = ImdbMirror(mirror_dir, base_url)
+    gcs_block = GcsBucket.load(block_name)
 
-    #iterate for every IMDB dataset
-    for imdb_data, filename in zip(imdb_collection, imdb_files.keys()):       
-        filename = "_".join(filename.split(".")[:2])
+    def upload(path, buffer):
+        #load Parquet file of a partition to GCS
+        gcs_block.upload_from_file_object(buffer, Path(path))
+
+    def spool(filename, count, chunk):
+        #keys of linked rows are needed by the next pass
+        if scope == 'linked':
+            keys.add(filename, chunk)
+
+        #every row is spooled for a new base, changed rows also
+        #for a changeset, and the choice is made once all are read
+        table = to_table(filename, chunk, batch)
+        partitions = partition_values(filename, table)
+        layout.write(filename, count, table, partitions)
+
+        is_changed, moved = trackers[filename].compare(table, partitions)
+        changesets.write(filename, count, table.filter(is_changed),
+                         partitions.filter(is_changed))
+        if len(moved) > 0:
+            changesets.write(filename, f'{count}-moved',
+                             *tombstones(filename, moved, batch))
+
+    def publish(filename):
+        tracker = trackers.pop(filename)
+        deleted = tracker.deleted()
+        if len(deleted) > 0:
+            changesets.write(filename, 'deleted', *tombstones(filename, deleted, batch))
+
+        index = tracker.index()
+        previous, count = hash_index.load(filename)
+        print(f"{filename}: {tracker.changes} rows inserted, updated or deleted")
+
+        if previous is None or count+1 >= compact_every \
+           or tracker.changes > compact_ratio * len(index):
+            #the new base already contains all earlier changesets. It is
+            #uploaded next to the old files, which are only deleted once
+            #the whole base is uploaded, so the table is never empty
+            folder = f"imdb/{table_name(filename)}"
+
+            def is_new_base(name):
+                return f"/{layout.prefix}-" in name
 
-        count = 0
-        while True:
             try:
-                count += 1                
-                chunk_data = next(imdb_data)
-                chunk_data = transform_imdb_data(chunk_data)
-
-                #load dataframe to GCS
-                main = f"imdb/{filename}/{filename}"
-                path = Path(f"{main}_part{count:02}.parquet")
-                df_to_gcs(chunk_data, path, 'parquet', block_name)   
-
-                #delay next iteration
-                time.sleep(5)
-            except StopIteration:
-                break
+                uploaded = layout.publish(filename, upload, upload_workers)
+            except Exception:
+                clear_gcs_folder(folder, block_name,
+                                 keep=lambda name: not is_new_base(name))
+                raise
+
+            #an interruption from here on leads to a full base next time
+            hash_index.invalidate(filename)
+            clear_gcs_folder(folder, block_name, keep=is_new_base)
+            changesets.reset(filename)
+            count = 0
+        else:
+            uploaded = changesets.publish(filename, upload, upload_workers)
+            layout.reset(filename)
+            count += 1 if uploaded > 0 else 0
+
+        hash_index.save(filename, index, count)
+        changed[f"imdb_{table_name(filename)}"] = uploaded > 0
+        return uploaded
+
+    def load_files(imdb_files, tag, linked=None):
+        readers = {}
+
+        for filename in imdb_files:
+            path, is_changed = sync_imdb_file(filename, mirror_dir, base_url, tag)
+            if scope == 'linked':
+                is_changed = is_changed or not keys.exists(filename)
+            changed[f"imdb_{table_name(filename)}"] = is_changed
+
+            if not is_changed:
+                print(f"Skipped {filename}: unchanged since last load")
+                continue
+
+            layout.reset(filename)
+            changesets.reset(filename)
+            trackers[filename] = ChangeTracker(filename, hash_index.load(filename)[0])
+            if engine == 'arrow':
+                readers[filename] = read_imdb_arrow(path, filename, memory_budget)
+            else:
+                readers[filename] = get_imdb_data(path, filename, memory_budget)
+
+        #Arrow kernels are multithreaded and run in the upload threads
+        workers = transform_workers
+        if engine == 'arrow':
+            transform, workers = partial(transform_imdb_table, scope=linked), 0
+        else:
+            transform = partial(transform_imdb_data, scope=linked)
+
+        done, errors = run_pipeline(readers, transform, spool,
+                                    workers, upload_workers, max_in_flight)
+
+        #only completely loaded files are skipped next time
+        for filename, count in done.items():
+            try:
+                uploaded = publish(filename)
+                if scope == 'linked':
+                    keys.save(filename)
+            except Exception as error:
+                errors[filename] = error
+                continue
+
+            mirror.mark_processed(filename, tag)
+            print(f"DONE: Uploaded {count} chunks of {filename} as {uploaded} files")
+
+        for filename, error in errors.items():
+            layout.reset(filename)
+            changesets.reset(filename)
+            trackers.pop(filename, None)
+            keys.discard(filename)
+            print(f"FAILED: {filename}: {error!r}")
+
+        #later passes need the keys of every file of this one
+        if len(errors) > 0:
+            raise RuntimeError(f"Failed to load {', '.join(errors)}")
+
+    if scope == 'all':
+        load_files(['title.basics.tsv.gz',
+                    'title.crew.tsv.gz',
+                    'title.ratings.tsv.gz',
+                    'title.principals.tsv.gz',
+                    'name.basics.tsv.gz'], SCHEMA_VERSION)
+        return changed
+
+    #the tag changes with the linked keys, so files are loaded
+    #again whenever other rows would be kept
+    linked = get_linked_scope(store_dir=oscars_dir)
+    load_files(['title.basics.tsv.gz'],
+               f"{SCHEMA_VERSION}:{linked.digest()}", linked)
+
+    linked = ImdbScope(keys.load('title.basics.tsv.gz'))
+    load_files(['title.crew.tsv.gz',
+                'title.ratings.tsv.gz',
+                'title.principals.tsv.gz'],
+               f"{SCHEMA_VERSION}:{linked.digest()}", linked)
+
+    linked = ImdbScope(linked.titles,
+                       keys.load('title.crew.tsv.gz', 'title.principals.tsv.gz'))
+    load_files(['name.basics.tsv.gz'],
+               f"{SCHEMA_VERSION}:{linked.digest()}", linked)
+
+    return changed
 
 
 @flow(name="source-to-gcs")
-def etl_load_to_gcs(block_name='bechdel-project-gcs'):
+def etl_load_to_gcs(block_name='bechdel-project-gcs', imdb_scope='all',
+                    oscars_dir='./datasets/oscars_pages'):
     """
     Primary workflow for extraction and loading of data.
     All collected data are placed into dataframes that
@@ -233,23 +507,37 @@ def etl_load_to_gcs(block_name='bechdel-project-gcs'):
 
     Arguments:
         block_name: name of Prefect block for GCS bucket
+        imdb_scope: 'all' to load all of IMDB, or 'linked' for only
+                    the titles and people linked to the Bechdel and
+                    Oscars datasets. Default set to 'all'.
+        oscars_dir: folder of the Oscars page store.
+                    Default set to ./datasets/oscars_pages.
 
     Returns:
-        None
+        dictionary of source name and whether its data changed
     """
 
-    #get and upload oscars data
-    oscars_data = get_oscars_data()
-    path = Path("oscars/oscars_awards.csv")
-    df_to_gcs(oscars_data, path, 'csv', block_name)
+    changed = {'oscars': False}
+
+    #get and upload oscars data only if the pages changed
+    oscars_data, digests = get_oscars_data(store_dir=oscars_dir)
+    if oscars_data is not None:
+        path = Path("oscars/oscars_awards.csv")
+        df_to_gcs(oscars_data, path, 'csv', block_name)
+        PageStore(oscars_dir).mark_published(digests)
+        changed['oscars'] = True
+
+    #get and upload changes in bechdel test movies data
+    changed['bechdel'] = bechdel_data_flow(block_name)
+
+    #get and upload changed imdb datasets in chunks
+    changed.update(imdb_data_flow(block_name, scope=imdb_scope,
+                                  oscars_dir=oscars_dir))
 
-    #get and upload bechdel test movies data
-    bechdel_data = get_bechdel_data()
-    path = Path("bechdel/bechdel_test_movies.csv")
-    df_to_gcs(bechdel_data, path, 'csv', block_name)
+    #requests and bytes received per host
+    print(f"HTTP transport stats: {get_stats()}")
 
-    #get and upload imdb datasets in chunks
-    imdb_data_flow(block_name)  
+    return changed
 
 
 if __name__=="__main__":   
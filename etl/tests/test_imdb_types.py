@@ -0,0 +1,65 @@
+"""----------------------------------------------------------------------
+Tests of the IMDB schema registry with malformed rows, like the shifted
+rows of title.basics, read by both the pandas and the Arrow engine.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import sys
+import gzip
+import pytest
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from imdb_transform import read_imdb_data, transform_imdb_data
+from imdb_arrow import read_imdb_arrow, transform_imdb_table
+
+FILENAME = 'title.basics.tsv.gz'
+
+#the second row is shifted: isAdult holds the year, which is out of
+#range for int8, endYear a letter and runtimeMinutes the genres
+ROWS = [
+    'tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres',
+    'tt0000001\tshort\tCarmencita\tCarmencita\t0\t1894\t\\N\t1\tDocumentary,Short',
+    'tt0000002\ttvSeries\tShifted\tShifted\t2005\t\\N\tx\tReality-TV\t\\N',
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / FILENAME
+    path.write_bytes(gzip.compress(('\n'.join(ROWS) + '\n').encode('utf-8')))
+    return str(path)
+
+
+def check(records):
+    assert [row['tconst'] for row in records] == [1, 2]
+    assert records[0]['runtimeMinutes'] == 1
+    assert records[0]['startYear'] == 1894
+    assert records[0]['genres'] == ['Documentary', 'Short']
+
+    #values which are not numbers of their type become null
+    assert records[1]['runtimeMinutes'] is None
+    assert records[1]['endYear'] is None
+    assert records[1]['isAdult'] is None
+    assert records[1]['startYear'] is None
+
+
+def test_pandas_engine_nulls_malformed_values(path):
+    df = next(read_imdb_data(path, FILENAME))
+    df = transform_imdb_data(FILENAME, df)
+
+    assert str(df['runtimeMinutes'].dtype) == 'Int32'
+    assert str(df['startYear'].dtype) == 'Int16'
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    check(table.to_pylist())
+
+
+def test_arrow_engine_nulls_malformed_values(path):
+    table = next(read_imdb_arrow(path, FILENAME))
+    table = transform_imdb_table(FILENAME, table)
+
+    assert table.schema.field('runtimeMinutes').type == pa.int32()
+    assert table.schema.field('startYear').type == pa.int16()
+    check(table.to_pylist())
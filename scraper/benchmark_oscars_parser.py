@@ -0,0 +1,259 @@
+"""----------------------------------------------------------------------
+Benchmark for the Oscars results parser. Generates synthetic
+resultscontainer pages of growing size, checks every parser backend
+against the expected results and reports rows per second and peak
+memory, optionally failing when a backend got slower than a baseline.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+import pandas as pd
+from scrape_oscars_db import PARSERS
+
+
+def ordinal(number):
+    if 10 <= number % 100 <= 20:
+        return f'{number}th'
+    return f"{number}{ {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')}"
+
+
+#where the winners of a category are listed: a single winner first,
+#a single winner after the nominees, several winning nominations in
+#one winner block, or a tie with one winner block per film
+WINNER_LAYOUTS = ['first', 'after', 'shared', 'tie']
+
+
+def winner_groups(layout, nominees):
+    """
+    Returns list of (is_winner, film indices) blocks in page order
+    """
+
+    if layout == 'after':
+        return [(False, [index]) for index in range(nominees-1)] \
+               + [(True, [nominees-1])]
+
+    if layout == 'shared':
+        winners = [(True, [0, 1])]
+    elif layout == 'tie':
+        winners = [(True, [0]), (True, [1])]
+    else:
+        winners = [(True, [0])]
+
+    first = sum(len(films) for _, films in winners)
+    return winners + [(False, [index]) for index in range(first, nominees)]
+
+
+def nominee_html(film, person):
+    return ('<div class="awards-result-nominationstatement">'
+            f'<div class="awards-result-nominee"><a>{person}</a></div>'
+            f'<div class="awards-result-film-title"><a>{film}</a></div>'
+            '</div>')
+
+
+def generate_page(ceremonies=95, categories=24, nominees=5,
+                  duplicate_rate=0.1, seed=0):
+    """
+    Generates a synthetic results page with the same structure as
+    the awards database search results, and the results expected
+    from parsing it.
+
+    Arguments:
+        - ceremonies: number of award ceremonies. Default set to 95.
+        - categories: number of categories per ceremony.
+                      Default set to 24.
+        - nominees: number of nominated films per category.
+                    Default set to 5.
+        - duplicate_rate: chance of a film being listed again in
+                          the same category, e.g. for another nominee.
+                          Default set to 0.1.
+        - seed: random seed. Default set to 0.
+
+    Every category gets one of WINNER_LAYOUTS at random, so the
+    parsers are also checked against ties and late winners.
+
+    Returns:
+        HTML page source and dataframe of expected results
+    """
+
+    rng = random.Random(seed)
+    expected = {"AwardYear":[], "AwardCeremonyNum":[], "Movie":[],
+                "AwardCategory":[], "AwardStatus":[]}
+
+    html = ['<html><body><div id="resultscontainer">']
+
+    for ceremony in range(1, ceremonies+1):
+        year = 1928 + ceremony
+        html.append('<div class="awards-result-chron result-group '
+                    'group-awardcategory-chron">'
+                    f'<div class="result-group-title"><a>{year} '
+                    f'({ordinal(ceremony)})</a></div>')
+
+        for category in range(categories):
+            title = f'CATEGORY {category:02} NAME'
+            films = [f'Film {ceremony}-{category}-{index}'
+                     for index in range(nominees)]
+
+            html.append('<div class="result-subgroup subgroup-awardcategory-chron">'
+                        f'<div class="result-subgroup-title"><a>{title}</a></div>')
+
+            #layouts with two winners need a third film as nominee
+            layout = rng.choice(WINNER_LAYOUTS) if nominees >= 3 else 'first'
+            status = ['nominated'] * nominees
+
+            for is_winner, indices in winner_groups(layout, nominees):
+                statements = ''.join(nominee_html(films[index],
+                                                  f'Person {ceremony}-{category}-{index}')
+                                     for index in indices)
+
+                if is_winner:
+                    html.append('<span title="Winner"></span>'
+                                f'<div class="result-details">{statements}</div>')
+                    for index in indices:
+                        status[index] = 'won'
+                    continue
+
+                html.append(statements)
+                if rng.random() < duplicate_rate:
+                    html.append(nominee_html(films[indices[0]],
+                                             f'Other {ceremony}-{category}-{indices[0]}'))
+
+            html.append('</div>')
+
+            expected["AwardYear"] += [str(year)] * nominees
+            expected["AwardCeremonyNum"] += [str(ceremony)] * nominees
+            expected["Movie"] += films
+            expected["AwardCategory"] += [title] * nominees
+            expected["AwardStatus"] += status
+
+        html.append('</div>')
+
+    html.append('</div></body></html>')
+
+    return ''.join(html), pd.DataFrame(expected)
+
+
+def matches(df, expected):
+    """
+    Compares parsed results with the expected ones, ignoring
+    the string dtype used
+    """
+
+    try:
+        pd.testing.assert_frame_equal(df.reset_index(drop=True).astype(object),
+                                      expected.astype(object))
+        return True
+    except AssertionError:
+        return False
+
+
+def run_benchmark(parser, page_source, expected, repeat=3):
+    """
+    Times a parser on a page and measures its peak memory
+    in a separate run, since tracing slows parsing down.
+
+    Arguments:
+        - parser: parser function
+        - page_source: HTML source to parse
+        - expected: dataframe of expected results
+        - repeat: number of timed runs. Default set to 3.
+
+    Returns:
+        dictionary of the best time, rows per second, peak memory
+        and whether the results matched
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parser(page_source)
+        times.append(time.perf_counter() - start)
+
+    #only Python allocations are traced, not lxml's own C memory
+    tracemalloc.start()
+    parser(page_source)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = min(times)
+    return {'rows': len(df),
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(len(df) / seconds),
+            'peak_mb': round(peak / 1024**2, 1),
+            'matches': matches(df, expected)}
+
+
+def compare_baseline(results, baseline, tolerance):
+    """
+    Returns list of results that are slower than the baseline
+    by more than the tolerance ratio
+    """
+
+    previous = {(row['backend'], row['ceremonies']): row for row in baseline}
+    slower = []
+
+    for row in results:
+        base = previous.get((row['backend'], row['ceremonies']))
+        if base is not None and row['seconds'] > base['seconds'] * tolerance:
+            slower.append(row)
+
+    return slower
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmark the Oscars parser")
+    parser.add_argument('--ceremonies', type=int, nargs='+', default=[10, 50, 100, 200],
+                        help="page sizes in number of ceremonies")
+    parser.add_argument('--categories', type=int, default=24)
+    parser.add_argument('--nominees', type=int, default=5)
+    parser.add_argument('--duplicate-rate', type=float, default=0.1)
+    parser.add_argument('--backends', nargs='+', default=list(PARSERS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="json file to save the results")
+    parser.add_argument('--baseline', help="json file of earlier results to compare")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="allowed slowdown ratio against the baseline")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'backend':>8} {'ceremonies':>10} {'rows':>8} {'seconds':>8} "
+          f"{'rows/s':>9} {'peak MB':>8} {'matches':>8}")
+
+    for ceremonies in args.ceremonies:
+        page_source, expected = generate_page(ceremonies, args.categories,
+                                              args.nominees, args.duplicate_rate,
+                                              args.seed)
+
+        for backend in args.backends:
+            row = run_benchmark(PARSERS[backend], page_source, expected, args.repeat)
+            row = {'backend': backend, 'ceremonies': ceremonies, **row}
+            results.append(row)
+
+            print(f"{backend:>8} {ceremonies:>10} {row['rows']:>8} {row['seconds']:>8} "
+                  f"{row['rows_per_second']:>9} {row['peak_mb']:>8} {str(row['matches']):>8}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failed = [row for row in results if not row['matches']]
+    for row in failed:
+        print(f"MISMATCH: {row['backend']} with {row['ceremonies']} ceremonies")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            slower = compare_baseline(results, json.load(file), args.tolerance)
+
+        for row in slower:
+            print(f"SLOWER: {row['backend']} with {row['ceremonies']} ceremonies")
+
+        failed += slower
+
+    sys.exit(1 if failed else 0)
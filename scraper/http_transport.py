@@ -0,0 +1,137 @@
+"""----------------------------------------------------------------------
+Shared HTTP transport for all extractors (TMDB, Bechdel and IMDB).
+Provides one pooled keep-alive session per process with compression
+negotiation, timeouts, bounded retries with jittered backoff, and
+request and byte counters per host.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import threading
+import requests
+from urllib.parse import urlsplit
+from collections import defaultdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+#encodings urllib3 is able to decode, e.g. br once brotli is installed
+from urllib3.util.request import ACCEPT_ENCODING
+
+#(connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+#429 is left out since callers handle it with their own rate limiter
+RETRY = Retry(total=4,
+              connect=4,
+              read=4,
+              status=4,
+              backoff_factor=0.5,
+              backoff_jitter=0.5,
+              status_forcelist=[500, 502, 503, 504],
+              allowed_methods=['HEAD', 'GET', 'POST'],
+              respect_retry_after_header=True,
+              raise_on_status=False)
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_stats = defaultdict(lambda: {'requests': 0, 'bytes': 0, 'errors': 0})
+
+
+class CountingSession(requests.Session):
+    """
+    Session which applies DEFAULT_TIMEOUT to every request that
+    does not set its own timeout, and counts requests, received
+    bytes and errors per host
+    """
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        host = urlsplit(url).netloc
+
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            record(host, 0, error=True)
+            raise
+
+        #streamed bodies are not read yet so the header is used instead
+        if kwargs.get('stream'):
+            size = int(response.headers.get('Content-Length', 0))
+        else:
+            size = response.raw.tell() or len(response.content)
+
+        record(host, size, error=response.status_code >= 400)
+        return response
+
+
+def record(host, size, error=False):
+    """
+    Updates the counters of a host
+    """
+
+    with _lock:
+        stats = _stats[host]
+        stats['requests'] += 1
+        stats['bytes'] += size
+        stats['errors'] += int(error)
+
+
+def get_session(pool_size=32):
+    """
+    Returns the pooled session of the current process. A new one
+    is created after a fork so sockets are never shared between
+    processes.
+
+    Arguments:
+        pool_size: maximum number of kept-alive connections per host.
+                   Default set to 32.
+
+    Returns:
+        requests session
+    """
+
+    global _session, _session_pid
+
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            session = CountingSession()
+            adapter = HTTPAdapter(pool_connections=16,
+                                  pool_maxsize=pool_size,
+                                  max_retries=RETRY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+            _session, _session_pid = session, os.getpid()
+
+    return _session
+
+
+def open_stream(url):
+    """
+    Opens a streamed GET request whose body can be read like a
+    file, e.g. by pd.read_csv. Content-Encoding is decoded on the
+    fly; compressed files (.gz) are returned as they are.
+
+    Arguments:
+        url: url of the file
+
+    Returns:
+        file-like object of the response body
+    """
+
+    response = get_session().get(url, stream=True)
+    response.raise_for_status()
+    response.raw.decode_content = True
+    return response.raw
+
+
+def get_stats():
+    """
+    Returns copy of the request, byte and error counters per host
+    """
+
+    with _lock:
+        return {host: dict(stats) for host, stats in _stats.items()}
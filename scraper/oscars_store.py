@@ -0,0 +1,147 @@
+"""----------------------------------------------------------------------
+Content-addressed store for scraped Oscars result pages. The results
+fragment of every page is saved gzip-compressed under its sha256 digest
+together with its parsed results as Parquet, so an unchanged page is
+never parsed or uploaded again and old snapshots can be re-parsed
+offline.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import glob
+import gzip
+import json
+import hashlib
+import pandas as pd
+from scrape_oscars_db import extract_oscar_results, results_fragment
+
+STATE_FILE = '_published.json'
+
+
+class PageStore:
+    """
+    Folder of raw pages ({digest}.html.gz), parsed results
+    ({digest}.parquet) and the digests of the last published snapshot.
+
+    Arguments:
+        - directory: folder of the store.
+                     Default set to ./datasets/oscars_pages.
+        - backend: parser backend given to extract_oscar_results.
+                   Default set to lxml.
+    """
+
+    def __init__(self, directory='./datasets/oscars_pages', backend='lxml'):
+        self.directory = directory
+        self.backend = backend
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest, extension):
+        return os.path.join(self.directory, f'{digest}.{extension}')
+
+    def add(self, page_source):
+        """
+        Saves the results of a page unless the same results are
+        already stored. Only resultscontainer is kept and hashed, so
+        a browser page with unchanged results keeps its digest.
+
+        Arguments:
+            page_source: HTML source of the results page
+
+        Returns:
+            sha256 hex digest of the results fragment
+        """
+
+        content = results_fragment(page_source).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.path(digest, 'html.gz')
+
+        if not os.path.exists(path):
+            with gzip.open(f'{path}.tmp', 'wb') as file:
+                file.write(content)
+            os.replace(f'{path}.tmp', path)
+
+        return digest
+
+    def read(self, digest):
+        """
+        Returns the raw page source of a digest
+        """
+
+        with gzip.open(self.path(digest, 'html.gz'), 'rb') as file:
+            return file.read().decode('utf-8')
+
+    def parse(self, digest, force=False):
+        """
+        Returns the parsed results of a stored page. The page is only
+        parsed if no results were saved for it yet, or if force is True.
+
+        Arguments:
+            - digest: sha256 hex digest of the page
+            - force: whether to parse again, e.g. after a parser change.
+                     Default set to False.
+
+        Returns:
+            Dataframe of award results
+        """
+
+        path = self.path(digest, 'parquet')
+
+        if os.path.exists(path) and not force:
+            return pd.read_parquet(path)
+
+        df = extract_oscar_results(self.read(digest), self.backend)
+        df.to_parquet(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+
+        return df
+
+    def results(self, digests):
+        """
+        Returns the combined results of a snapshot of pages
+        in the given order
+        """
+
+        frames = [self.parse(digest) for digest in digests]
+        return pd.concat(frames).reset_index(drop=True)
+
+    def published(self):
+        """
+        Returns list of page digests of the last published snapshot
+        """
+
+        path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(path):
+            return []
+
+        with open(path) as file:
+            return json.load(file)['digests']
+
+    def is_published(self, digests):
+        return list(digests) == self.published()
+
+    def mark_published(self, digests):
+        """
+        Records the page digests of a snapshot once its results
+        were uploaded
+        """
+
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump({'digests': list(digests)}, file)
+        os.replace(f'{path}.tmp', path)
+
+    def reparse(self):
+        """
+        Parses every stored page again without scraping, e.g. after
+        the parser changed.
+
+        Returns:
+            number of re-parsed pages
+        """
+
+        paths = sorted(glob.glob(f'{self.directory}/*.html.gz'))
+        for path in paths:
+            self.parse(os.path.basename(path)[:-len('.html.gz')], force=True)
+
+        return len(paths)
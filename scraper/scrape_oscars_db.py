@@ -1,30 +1,44 @@
 """----------------------------------------------------------------------
 Script for web scraping data in the Oscar Academy Awards database
 
-Last modified: March 2023
+Last modified: October 2026
 ----------------------------------------------------------------------"""
 
+import io
 import re
-import time
+import json
+import queue
+import requests
+import lxml.html
 import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
+from lxml import etree
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from http_transport import get_session
 
+OSCARS_URL = "https://awardsdatabase.oscars.org/"
 
-def scrape_oscars_data(delay=60):
+#endpoint called by the search button of the awards database
+SEARCH_PATH = "Search/GetResults"
+
+
+def create_driver(block_assets=True):
     """
-    Interacts with the Academy Award database using Selenium to return 
-    award results from the first until the latest awarding year ceremony.
+    Creates a headless Firefox driver. Images, fonts and stylesheets
+    are blocked by default since only the HTML is needed.
 
     Arguments:
-        delay: time to wait for results page to load in seconds.
-               default set at 60 seconds
+        block_assets: whether to block images, fonts and CSS.
+                      Default set to True.
 
     Returns:
-        HTML page source of the site
+        Selenium Firefox webdriver
     """
 
     options = webdriver.FirefoxOptions()
@@ -32,8 +46,73 @@ def scrape_oscars_data(delay=60):
     options.add_argument('--incognito')
     options.add_argument('--headless')
 
-    driver = webdriver.Firefox(options=options)
-    driver.get("https://awardsdatabase.oscars.org/") 
+    if block_assets:
+        options.set_preference('permissions.default.image', 2)
+        options.set_preference('permissions.default.stylesheet', 2)
+        options.set_preference('browser.display.use_document_fonts', 0)
+        options.set_preference('gfx.downloadable_fonts.enabled', False)
+
+    return webdriver.Firefox(options=options)
+
+
+def latest_ceremony(driver):
+    """
+    Reads the number of the latest award ceremony from the
+    ending year selection of the search form.
+
+    Arguments:
+        driver: Selenium webdriver
+
+    Returns:
+        latest ceremony number (int)
+    """
+
+    driver.get(OSCARS_URL)
+
+    xpath = "//button[contains(@class,'awards-advsrch-yearsto')]"
+    driver.find_element(By.XPATH, xpath).click()
+
+    xpath = "//div[@class='btn-group multiselect-btn-group open']//li"
+    return len(driver.find_elements(By.XPATH, xpath))-2
+
+
+def results_loaded(driver):
+    """
+    Wait condition which is met once resultscontainer holds
+    at least one award year group
+    """
+
+    xpath = '//*[@id="resultscontainer"]//div[contains(@class,"result-group")]'
+    return len(driver.find_elements(By.XPATH, xpath)) > 0
+
+
+def scrape_oscars_data(delay=60, from_ceremony=1, to_ceremony=None,
+                       driver=None):
+    """
+    Interacts with the Academy Award database using Selenium to return 
+    award results from the first until the latest awarding year ceremony.
+
+    Arguments:
+        delay: maximum time to wait for results page to load in seconds.
+               default set at 60 seconds
+        from_ceremony: first ceremony number to search. Default set to 1.
+        to_ceremony: last ceremony number to search. Default set to
+                     None which will get the latest ceremony.
+        driver: Selenium webdriver to reuse. Default set to None which
+                will create a new driver and close it afterwards.
+
+    Returns:
+        HTML page source of the site
+    """
+
+    own_driver = driver is None
+    if own_driver:
+        driver = create_driver()
+
+    if to_ceremony is None:
+        to_ceremony = latest_ceremony(driver)
+
+    driver.get(OSCARS_URL) 
 
     #select award categories
     xpath = "//button[contains(@class,'awards-basicsrch-awardcategory')]"
@@ -46,30 +125,24 @@ def scrape_oscars_data(delay=60):
     xpath = "//button[contains(@class,'awards-advsrch-yearsfrom')]"
     driver.find_element(By.XPATH, xpath).click()
 
-    xpath = "//div[@class='btn-group multiselect-btn-group open']//input[@value='1']"
+    xpath = f"//div[@class='btn-group multiselect-btn-group open']//input[@value='{from_ceremony}']"
     driver.find_element(By.XPATH, xpath).click()
 
     #select ending award year
     xpath = "//button[contains(@class,'awards-advsrch-yearsto')]"
     driver.find_element(By.XPATH, xpath).click()
 
-    xpath = "//div[@class='btn-group multiselect-btn-group open']//li"
-    latest = len(driver.find_elements(By.XPATH, xpath))-2
-
-    xpath = f"//div[@class='btn-group multiselect-btn-group open']//input[@value='{latest}']"
+    xpath = f"//div[@class='btn-group multiselect-btn-group open']//input[@value='{to_ceremony}']"
     driver.find_element(By.XPATH, xpath).click()
 
     #search to view results
     driver.find_element(By.XPATH, '//*[@id="btnbasicsearch"]').click()
 
-    #wait for all results to show
-    time.sleep(delay)
-
     try:
-        #resultscontainer will contain all our needed Oscars data
-        driver.find_element(By.XPATH, '//*[@id="resultscontainer"]')
+        #wait only until resultscontainer is populated
+        WebDriverWait(driver, delay, poll_frequency=0.5).until(results_loaded)
 
-    except NoSuchElementException as error:
+    except TimeoutException as error:
         print(error)
         print(f"Needed element still not found after {delay} seconds delay")
 
@@ -77,13 +150,305 @@ def scrape_oscars_data(delay=60):
     page_source = driver.page_source
 
     #close driver
-    driver.close()
-    print("Driver closed")
+    if own_driver:
+        driver.quit()
+        print("Driver closed")
 
     return page_source
 
 
-def extract_oscar_results(page_source):
+def scrape_oscars_http(from_ceremony=1, to_ceremony=None, 
+                       base_url=OSCARS_URL, timeout=300):
+    """
+    Gets the award results without a browser. The search form is
+    read once to find the current award categories and the latest
+    ceremony, then the same search request sent by the site's
+    search button is posted directly over HTTP.
+
+    Arguments:
+        from_ceremony: first ceremony number to search. Default set to 1.
+        to_ceremony: last ceremony number to search. Default set to
+                     None which will get the latest ceremony.
+        base_url: url of the awards database. Can be changed to a
+                  local server replaying recorded pages.
+        timeout: maximum time to wait for the results in seconds.
+                 Default set to 300.
+
+    Returns:
+        HTML page source containing resultscontainer
+    """
+
+    session = get_session()
+
+    response = session.get(base_url)
+    response.raise_for_status()
+    form = lxml.html.fromstring(response.content)
+
+    #same selection as the Current Categories option in the browser
+    categories = form.xpath("//optgroup[contains(@label,'Current Categories')]"
+                            "/option/@value")
+
+    if to_ceremony is None:
+        xpath = "//select[contains(@id,'AwardShowNumberTo')]/option/@value"
+        to_ceremony = max(int(value) for value in form.xpath(xpath)
+                          if value.isdigit())
+
+    query = {
+        "AwardCategory": categories,
+        "AwardShowNumberFrom": str(from_ceremony),
+        "AwardShowNumberTo": str(to_ceremony),
+        "Sort": "3-Award Category-Chron",
+        "Search": "Basic"
+    }
+
+    response = session.post(urljoin(base_url, SEARCH_PATH),
+                            params={'query': json.dumps(query)},
+                            timeout=(10, timeout))
+    response.raise_for_status()
+
+    #the search returns only the content of resultscontainer
+    page_source = response.text
+    if 'id="resultscontainer"' not in page_source:
+        page_source = f'<div id="resultscontainer">{page_source}</div>'
+
+    return page_source
+
+
+def results_fragment(page_source):
+    """
+    Cuts the resultscontainer element out of a results page. The rest
+    of a browser page, e.g. scripts and tokens, changes on every visit.
+
+    Arguments:
+        page_source: HTML source of the results page
+
+    Returns:
+        HTML source of resultscontainer
+    """
+
+    root = lxml.html.fromstring(page_source)
+    containers = root.xpath('//*[@id="resultscontainer"]')
+    if len(containers) == 0:
+        raise ValueError("No resultscontainer found in the page")
+
+    return lxml.html.tostring(containers[0], encoding='unicode')
+
+
+def scrape_oscars_pages(fetch_mode='http', base_url=OSCARS_URL):
+    """
+    Gets the raw results pages of all award ceremonies. The 
+    browser-free HTTP mode is tried first, and Selenium is used as 
+    a fallback when the request fails or returns no results.
+
+    Arguments:
+        fetch_mode: either 'http' or 'selenium'. Default set to 'http'.
+        base_url: url of the awards database for the HTTP mode
+
+    Returns:
+        list of HTML page sources in ceremony order
+    """
+
+    if fetch_mode == 'http':
+        try:
+            page_source = scrape_oscars_http(base_url=base_url)
+
+            #an unexpected form or response must not stop the fallback
+            if YEAR_GROUP_CLASS in results_fragment(page_source):
+                return [page_source]
+
+            print("No results found through HTTP")
+
+        except (requests.RequestException, etree.LxmlError,
+                ValueError, IndexError, KeyError) as error:
+            print(f"HTTP fetch failed: {error!r}")
+
+        print("Falling back to Selenium")
+
+    return scrape_oscars_shards(parse=False)
+
+
+def scrape_oscars(fetch_mode='http', base_url=OSCARS_URL):
+    """
+    Gets all award results as a dataframe using scrape_oscars_pages
+
+    Arguments:
+        fetch_mode: either 'http' or 'selenium'. Default set to 'http'.
+        base_url: url of the awards database for the HTTP mode
+
+    Returns:
+        Dataframe of all award results
+    """
+
+    pages = scrape_oscars_pages(fetch_mode, base_url)
+    results = [extract_oscar_results(page_source) for page_source in pages]
+    return pd.concat(results).reset_index(drop=True)
+
+
+def scrape_oscars_shards(chunk_size=10, workers=3, delay=60, parse=True):
+    """
+    Scrapes the Academy Award database in chunks of ceremonies
+    using a small pool of reusable headless drivers. The page source
+    of each chunk is parsed on its own, which keeps every page small.
+
+    Arguments:
+        chunk_size: number of ceremonies per search. Default set to 10.
+        workers: number of browsers running at the same time.
+                 Default set to 3.
+        delay: maximum time to wait for each results page in seconds.
+               Default set to 60.
+        parse: whether to parse the pages. Default set to True.
+
+    Returns:
+        Dataframe of all award results in ceremony order, or list
+        of page sources per chunk if parse is False
+    """
+
+    drivers = queue.Queue()
+    created = []
+
+    def get_driver():
+        try:
+            return drivers.get_nowait()
+        except queue.Empty:
+            driver = create_driver()
+            created.append(driver)
+            return driver
+
+    def scrape_chunk(ceremonies):
+        driver = get_driver()
+        try:
+            page_source = scrape_oscars_data(delay, ceremonies[0],
+                                             ceremonies[-1], driver)
+        finally:
+            drivers.put(driver)
+
+        print(f"Scraped ceremonies {ceremonies[0]} to {ceremonies[-1]}")
+        return extract_oscar_results(page_source) if parse else page_source
+
+    try:
+        latest = latest_ceremony(get_driver())
+        drivers.put(created[0])
+
+        ceremonies = list(range(1, latest+1))
+        chunks = [ceremonies[i:i+chunk_size] 
+                  for i in range(0, len(ceremonies), chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scrape_chunk, chunks))
+
+    finally:
+        for driver in created:
+            driver.quit()
+        print("Drivers closed")
+
+    if not parse:
+        return results
+
+    return pd.concat(results).reset_index(drop=True)
+
+
+def has_class(name):
+    """
+    XPath condition matching elements having the given class
+    """
+
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+#compiled XPath expressions used by the lxml parser
+XPATH_YEAR_TITLE = etree.XPath(f".//div[{has_class('result-group-title')}][1]")
+XPATH_CATEGORIES = etree.XPath(
+                    ".//div[@class='result-subgroup subgroup-awardcategory-chron']")
+XPATH_CATEGORY_TITLE = etree.XPath(f".//div[{has_class('result-subgroup-title')}][1]")
+XPATH_FILMS = etree.XPath(f".//div[{has_class('awards-result-film-title')}]")
+#every winner block counts, since tied winners have one block each
+XPATH_WINNERS = etree.XPath(
+                    ".//span[@title='Winner']/following-sibling::div[1]"
+                    f"//div[{has_class('awards-result-film-title')}]")
+XPATH_HAS_WINNER = etree.XPath("boolean(.//span[@title='Winner'])")
+
+YEAR_GROUP_CLASS = 'awards-result-chron result-group group-awardcategory-chron'
+
+
+def element_text(element):
+    """
+    Same as BeautifulSoup get_text(strip=True) for lxml elements
+    """
+
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def extract_oscar_results_lxml(page_source):
+    """
+    Parses the page_source incrementally with lxml. Every award year
+    group is processed with compiled XPath expressions as soon as it
+    is complete and then removed from the tree, and rows are written
+    straight into column lists. Duplicated nominees keep their first
+    position so the row order is always the same.
+
+    Arguments:
+        page_source: HTML source of the site
+
+    Returns:
+        Dataframe with the same columns as extract_oscar_results_bs4
+    """
+
+    columns = {"AwardYear":[], "AwardCeremonyNum":[], "Movie":[],
+               "AwardCategory":[], "AwardStatus":[]}
+
+    if isinstance(page_source, str):
+        page_source = page_source.encode('utf-8')
+
+    in_results = False
+    events = etree.iterparse(io.BytesIO(page_source), events=('start', 'end'),
+                             tag='div', html=True, encoding='utf-8')
+
+    for event, element in events:
+        #only award year groups inside resultscontainer are needed
+        if element.get('id') == 'resultscontainer':
+            in_results = event == 'start'
+            continue
+
+        if event != 'end' or not in_results \
+           or element.get('class') != YEAR_GROUP_CLASS:
+            continue
+
+        #separate award year title to extract year
+        key_split = element_text(XPATH_YEAR_TITLE(element)[0]).split(" ")
+        award_year = key_split[0]
+        ceremony_num = re.findall(r'\d+', key_split[1])[0]
+
+        for category in XPATH_CATEGORIES(element):
+            titles = XPATH_CATEGORY_TITLE(category)
+
+            #categories without a winner are left out
+            if len(titles) == 0 or not XPATH_HAS_WINNER(category):
+                continue
+
+            award_title = element_text(titles[0])
+
+            #remove duplicates while keeping the page order
+            movies = list(dict.fromkeys(element_text(film) for film
+                                        in XPATH_FILMS(category)))
+            winners = {element_text(film) for film in XPATH_WINNERS(category)}
+
+            count = len(movies)
+            columns["AwardYear"] += [award_year] * count
+            columns["AwardCeremonyNum"] += [ceremony_num] * count
+            columns["Movie"] += movies
+            columns["AwardCategory"] += [award_title] * count
+            columns["AwardStatus"] += ['won' if movie in winners 
+                                       else 'nominated' for movie in movies]
+
+        #free the parsed award year group
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+    return pd.DataFrame(columns)
+
+
+def extract_oscar_results_bs4(page_source):
     """
     Function which parses the page_source using BeautifulSoup 
     and turns it into the structured format of a dataframe.
@@ -142,14 +507,16 @@ def extract_oscar_results(page_source):
                 movies = [movie.get_text(strip=True) for movie in award_category_group\
                                .find_all('div', class_='awards-result-film-title')]
 
-                #remove duplicates
-                movies = list(set(movies)) 
+                #remove duplicates while keeping the page order
+                movies = list(dict.fromkeys(movies))
 
-                #find winning movie/s
-                winner_group = award_category_group.find('span', {'title':'Winner'})\
-                                                   .find_next_sibling('div')
+                #find winning movie/s, tied winners have one block each
+                winner_spans = award_category_group.find_all('span', {'title':'Winner'})
+                if len(winner_spans) == 0:
+                    continue
 
-                winners = [movie.get_text(strip=True) for movie in winner_group\
+                winners = [movie.get_text(strip=True) for span in winner_spans
+                           for movie in span.find_next_sibling('div')\
                                 .find_all('div', class_='awards-result-film-title')]
 
                 #update df_structure movie and category lists
@@ -159,9 +526,9 @@ def extract_oscar_results(page_source):
                     df_structure['AwardCategory'].extend(repeat)
 
                     #add winner/s
-                    repeat = list(np.repeat(['nominated'],len(movies)))
-                    for winner in winners:
-                        repeat[movies.index(winner)] = 'won'
+                    winners = set(winners)
+                    repeat = ['won' if movie in winners else 'nominated'
+                              for movie in movies]
 
                     df_structure['AwardStatus'].extend(repeat)
         
@@ -175,12 +542,38 @@ def extract_oscar_results(page_source):
     return pd.concat(oscars_results).reset_index(drop=True)
 
 
+#available parser backends for extract_oscar_results
+PARSERS = {
+    'lxml': extract_oscar_results_lxml,
+    'bs4': extract_oscar_results_bs4
+}
+
+
+def extract_oscar_results(page_source, backend='lxml'):
+    """
+    Parses the page_source of the awards database into a dataframe.
+
+    Arguments:
+        page_source: HTML source of the site
+        backend: parser to use, either 'lxml' (streaming) or 'bs4'
+                 (BeautifulSoup). Default set to 'lxml'.
+
+    Returns:
+        Dataframe with the following columns:
+            - AwardYear: the year the award was received
+            - AwardCeremonyNum: the nth annual ceremony award
+            - Movie: the title of the nominated film
+            - AwardCategory: the category the film was nominated for
+            - AwardStatus: whether the film was only nominated or had won
+    """
+
+    return PARSERS[backend](page_source)
+
+
 if __name__=="__main__":
 
-    page_source = scrape_oscars_data()
+    results_df = scrape_oscars()
     print("DONE: Scraped Oscars data")
-
-    results_df = extract_oscar_results(page_source)
     print("DONE: Extracted needed elements from HTML")
     print("DONE: Data formatted as a structured dataframe\n")
 
@@ -3,39 +3,243 @@ Script for collecting movie data from the TMDB API. This can be added to
 expand the Bechdel test porject in the future to account for the gender 
 of the movie's cast and crew.
 
-Last modified: April 2023
+Last modified: October 2026
 ----------------------------------------------------------------------"""
 
+import os
+import json
 import time
-import requests
+import heapq
+import argparse
+import tempfile
 import pandas as pd
-from datetime import date
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, timedelta
 from configparser import ConfigParser
+from tmdb_cache import ResponseCache
+from tmdb_journal import ScrapeJournal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tmdb_writer import CATEGORY, CreditsWriter, read_persons, iter_credits
+from tmdb_client import API_ROOT, TokenBucket, SharedTokenBucket, fetch_all
 
+#state file of tmdb_refresh, seeded once a full scrape has finished
+STATE_FILE = '_refresh_state.json'
 
-def response_json(API_URL):
+
+def window_url(url, start, end):
+    """
+    Adds the release date window filter to a discover url
+    """
+
+    return f'{url}&primary_release_date.gte={start}&primary_release_date.lte={end}'
+
+
+def plan_discovery(API_KEY, years, max_pages=500, max_workers=8,
+                   rate_limiter=None, cache=None):
+    """
+    Splits every year into release date windows. Windows having more
+    than max_pages results pages are halved recursively until each of
+    them fits, so no movie is cut off by the TMDB page limit.
+
+    Arguments:
+        - API_KEY: the generated API key from the tmdb API
+        - years: iterable of years to plan
+        - max_pages: page limit of a single discover query.
+                     Default set to 500 which is the TMDB maximum.
+        - max_workers: number of requests kept in flight
+        - rate_limiter: TokenBucket shared by all requests
+        - cache: ResponseCache shared by all requests
+
+    Returns:
+        sorted list of (start, end, pages) tuples where start and end
+        are dates and pages is the number of pages of the window, and
+        the set of years which could not be fully planned
+    """
+
+    url = f'{API_ROOT}/discover/movie?api_key={API_KEY}'
+
+    windows = []
+    failed = set()
+    todo = [(date(year, 1, 1), date(year, 12, 31)) for year in years]
+
+    #every loop checks one level of splits across all years at once
+    while len(todo) > 0:
+        urls = [window_url(url, start, end) for start, end in todo]
+        split = []
+
+        for (start, end), (_, movies) in zip(todo, fetch_all(urls, max_workers,
+                                                             rate_limiter,
+                                                             cache)):
+            if movies == "REQUEST ERROR":
+                print(f"Failed to get pages for window {start} to {end}")
+                failed.add(start.year)
+                continue
+
+            pages = movies['total_pages']
+
+            if pages > max_pages and start < end:
+                middle = start + (end - start) // 2
+                split.append((start, middle))
+                split.append((middle + timedelta(days=1), end))
+
+            elif pages > 0:
+                #a single day can still exceed the limit
+                windows.append((start, end, min(pages, max_pages)))
+
+                #log update
+                print(f"Window {start} to {end} with {pages} pages")
+
+        todo = split
+
+    windows = [window for window in sorted(windows) 
+               if window[0].year not in failed]
+    return windows, failed
+
+
+def plan_shards(windows, num_shards):
+    """
+    Groups release date windows into shards of similar total pages
+    by always giving the next largest window to the lightest shard.
+
+    Arguments:
+        - windows: list of (start, end, pages) tuples
+        - num_shards: number of shards to create
+
+    Returns:
+        list of shards, each a sorted list of windows
+    """
+
+    shards = [(0, index, []) for index in range(num_shards)]
+    heapq.heapify(shards)
+
+    for window in sorted(windows, key=lambda window: -window[2]):
+        load, index, shard = heapq.heappop(shards)
+        shard.append(window)
+        heapq.heappush(shards, (load + window[2], index, shard))
+
+    return [sorted(shard) for _, _, shard in sorted(shards, key=lambda x: x[1])
+            if len(shard) > 0]
+
+
+def update_person_index(index, resolved, index_path=None):
     """
-    Uses Python requests to get content of specified url
+    Appends newly resolved people to the person index and saves it.
+    Only the new rows are appended to the csv, so processes sharing
+    one index never overwrite the people resolved by each other.
 
     Arguments:
-        API_URL: url of API
+        - index: dataframe of the current person index
+        - resolved: dictionary of tmdb_person_id and imdb_person_id lists
+        - index_path: csv path of the index. Default set to None
+                      which will not save the index.
 
     Returns:
-        json object of the response. 
-        If status code error, returns "REQUEST ERROR" string
+        updated person index dataframe
+    """
+
+    resolved = pd.DataFrame(resolved, columns=index.columns)
+    index = pd.concat([index, resolved], ignore_index=True)
+    index['tmdb_person_id'] = index['tmdb_person_id'].astype('int64')
+    index['imdb_person_id'] = index['imdb_person_id'].astype('string')
+
+    if index_path is not None and len(resolved) > 0:
+        #the file appears with its header at once, by linking a
+        #temporary file which fails if another process was first
+        if not os.path.exists(index_path):
+            tmp = f'{index_path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as file:
+                file.write(','.join(index.columns) + '\n')
+            try:
+                os.link(tmp, index_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp)
+
+        #a single append call, which other processes cannot interleave
+        rows = resolved.to_csv(index=False, header=False).encode('utf-8')
+        fd = os.open(index_path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, rows)
+        finally:
+            os.close(fd)
+
+    return index
+
+
+def resolve_person_ids(person_ids, API_KEY, index_path=None, max_workers=8,
+                       rate_limiter=None, cache=None, flush_every=500):
     """
+    Resolves the imdb id of each tmdb person id. Ids are deduplicated
+    before fetching and ids already found in the persistent index
+    from previous runs are not requested again.
+
+    Arguments:
+        - person_ids: iterable of tmdb person ids (may repeat)
+        - API_KEY: the generated API key from the tmdb API
+        - index_path: csv path of the tmdb_person_id to imdb_person_id
+                      index. Default set to None (no persistence).
+        - max_workers: number of requests kept in flight
+        - rate_limiter: TokenBucket shared by all requests
+        - cache: ResponseCache shared by all requests
+        - flush_every: number of newly resolved ids before the index
+                       is saved. Default set to 500.
+
+    Returns:
+        Dataframe with one row per unique id and the columns
+        tmdb_person_id and imdb_person_id
+    """
+
+    columns = ['tmdb_person_id', 'imdb_person_id']
+
+    if index_path is not None and os.path.exists(index_path):
+        index = pd.read_csv(index_path, dtype={'imdb_person_id':'string'})
 
-    response = requests.get(API_URL)
-    if response.status_code==200:
-        return response.json()
+        #processes sharing the index can resolve the same person
+        index = index.drop_duplicates('tmdb_person_id', keep='last')
     else:
-        return "REQUEST ERROR"
+        index = pd.DataFrame(columns=columns)
 
+    #only fetch ids which were never resolved before
+    unique_ids = pd.Index(pd.unique(pd.Series(person_ids, dtype='int64')))
+    missing = unique_ids[~unique_ids.isin(index['tmdb_person_id'])]
 
-def get_tmdb_data(API_KEY, from_year=1874, to_year=None, delay=5):
+    print(f"{len(unique_ids)} unique people, {len(missing)} to request")
+
+    urls = [f'{API_ROOT}/person/{id}/external_ids?api_key={API_KEY}'
+            for id in missing]
+
+    resolved = {'tmdb_person_id':[], 'imdb_person_id':[]}
+
+    for id, (_, person) in zip(missing, fetch_all(urls, max_workers,
+                                                  rate_limiter, cache)):
+        #failed requests are left out so they are retried next run
+        if person == "REQUEST ERROR":
+            continue
+
+        resolved['tmdb_person_id'].append(id)
+        resolved['imdb_person_id'].append(person['imdb_id'])
+
+        #save progress so a crash does not resolve people again
+        if len(resolved['tmdb_person_id']) >= flush_every:
+            index = update_person_index(index, resolved, index_path)
+            resolved = {'tmdb_person_id':[], 'imdb_person_id':[]}
+
+    index = update_person_index(index, resolved, index_path)
+
+    return index[index['tmdb_person_id'].isin(unique_ids)]\
+                .reset_index(drop=True)
+
+
+def get_tmdb_data(API_KEY, from_year=1874, to_year=None,
+                  max_workers=8, rate_limiter=None, cache=None,
+                  person_index=None, journal_dir=None, flush_every=500,
+                  as_iterator=False, windows=None, max_pages=500):
     """
     Scrapes and extract movie credits data from The Movie Database 
-    using heir own API.
+    using heir own API. Requests run concurrently and are throttled
+    by a token bucket instead of fixed delays.
 
     Arguments:
         - API_KEY: the generated API key from the tmdb API
@@ -43,11 +247,31 @@ def get_tmdb_data(API_KEY, from_year=1874, to_year=None, delay=5):
                      Default set to 1874. 
         - to_year: final year to end collecting movie data.
                    Default set to None which will get current year.
-        - delay: time delay in seconds in-between requests. 
-                 Default set to 5 seconds.
+        - max_workers: number of requests kept in flight.
+                       Default set to 8.
+        - rate_limiter: TokenBucket shared by all requests.
+                        Default set to None which will create one
+                        with the default TMDB rate limit.
+        - cache: ResponseCache used to skip unchanged requests
+                 on re-runs. Default set to None (no caching).
+        - person_index: csv path of the tmdb to imdb person id index
+                        kept across runs. Default set to None which
+                        will keep it inside the journal folder.
+        - journal_dir: folder of the progress journal used to resume
+                       a crashed run. Default set to None (no resume).
+        - flush_every: number of movies or people kept in memory
+                       before flushing them to disk. Default set to 500.
+        - as_iterator: if True, returns a generator of dataframes read
+                       lazily from the journal folder instead of one
+                       dataframe. Default set to False.
+        - windows: list of (start, end, pages) release date windows to
+                   scrape, e.g. one shard from plan_shards. Default set
+                   to None which will plan the windows of the year range.
+        - max_pages: page limit of a single discover query.
+                     Default set to 500 which is the TMDB maximum.
 
     Returns:
-        Dataframe with the following columns:
+        Dataframe (or generator of dataframes) with the following columns:
             - tmdb_id: movie id from tmdb
             - imdb_id: movie id from imdb
             - tmdb_person_id: tmdb id of cast/crew
@@ -67,172 +291,416 @@ def get_tmdb_data(API_KEY, from_year=1874, to_year=None, delay=5):
     else:
         latest = to_year
 
-    #main discover api url
-    url = f'https://api.themoviedb.org/3/discover/movie?api_key={API_KEY}'
+    if rate_limiter is None:
+        rate_limiter = TokenBucket()
 
-    #dictionary to contain total number of pages
-    total_pages = {}
+    if journal_dir is None and as_iterator:
+        raise ValueError("as_iterator needs a journal_dir to read from")
 
-    # (1) collect total number of pages per year
-    print("START: Collecting total number of pages per year...")
+    if journal_dir is None:
+        #without a journal, keep partial results in a throwaway folder
+        with tempfile.TemporaryDirectory() as tmp:
+            return get_tmdb_data(API_KEY, from_year, to_year, max_workers,
+                                 rate_limiter, cache, person_index,
+                                 journal_dir=tmp, flush_every=flush_every,
+                                 windows=windows, max_pages=max_pages)
 
-    for year in range(from_year, latest+1):
-        movies = response_json(f'{url}&primary_release_year={year}')
-        pages = movies['total_pages']
+    journal = ScrapeJournal(journal_dir)
 
-        #tmdb api only allows up to 500 pages maximum
-        if pages > 501:
-            total_pages[year] = 500
-        elif pages == 0:
-            pass
-        else:
-            total_pages[year] = pages
+    if person_index is None:
+        person_index = journal.person_index
 
-        #log update
-        print(f"Year {year} with {pages} pages")
+    #failed requests stay pending in the journal for the next run
+    failures = 0
+
+    #main discover api url
+    url = f'{API_ROOT}/discover/movie?api_key={API_KEY}'
 
-        #delay next request
-        time.sleep(delay)
+    # (1) split each year into windows under the page limit
+    if windows is None:
+        print("START: Planning release date windows per year...")
 
-    print("DONE: Collected total number of pages per year")
+        planned = journal.planned_years()
+        years = [year for year in range(from_year, latest+1)
+                 if year not in planned]
 
-    #dictionary to contain year and tmdb ids
-    tmdb_ids = []
+        planned, failed = plan_discovery(API_KEY, years, max_pages,
+                                         max_workers, rate_limiter, cache)
 
-    # (2) collect top most popular tmdb ids per year
-    print("START: Collecting top most popular tmdb movies per year...")
+        #years that failed are planned again on the next run
+        failures += len(failed)
+        journal.add_windows([year for year in years if year not in failed],
+                            planned)
+        windows = journal.windows(from_year, latest)
 
-    for year, pages in total_pages.items():
-        for page in range(1, pages+1):
-            movies = response_json(f'{url}&primary_release_year={year}&page={page}')
-            ids = [movie['id'] for movie in movies['results']]
-            tmdb_ids.extend(ids)
+        print(f"DONE: Planned {len(windows)} release date windows")
 
-            #delay next request
-            time.sleep(delay)
-    
-        #log update
-        print(f"Scraped id for year {year}")
+    # (2) collect tmdb ids of every release date window
+    print("START: Collecting tmdb movies per release date window...")
+
+    done_pages = journal.done_pages()
+    todo = [(start, end, page) for start, end, pages in windows
+            for page in range(1, pages+1)
+            if (start, page) not in done_pages]
+
+    urls = [f'{window_url(url, start, end)}&page={page}'
+            for start, end, page in todo]
 
-    print("DONE: Collected top most popular tmdb movies per year")
+    for (start, end, page), (_, movies) in zip(todo, fetch_all(urls, 
+                                                               max_workers,
+                                                               rate_limiter,
+                                                               cache)):
+        if movies == "REQUEST ERROR":
+            print(f"Failed to get page {page} of window {start} to {end}")
+            failures += 1
+            continue
 
-    #delay next part by 1 minute
-    time.sleep(60)
+        ids = [movie['id'] for movie in movies['results']]
+        journal.add_page(start, page, ids)
 
-    #list containing dataframes
-    df_list = []
+    #all tmdb ids collected so far, including previous runs
+    tmdb_ids = journal.discovered_ids([start for start, _, _ in windows])
+
+    print("DONE: Collected tmdb movies per release date window")
 
     # (3) collect imdb ids plus the cast and crew info of the movie
     print("START: Collecting cast and crew info for each movie...")
 
-    for index, movie_id in enumerate(tmdb_ids):
-        #dictionaries for data structure
-        df_structure = {
-            'tmdb_id':movie_id,
-            'imdb_id':'',
-            'tmdb_person_id':[],
-            'name':[],
-            'gender':[],
-            'department':[],
-            'job':[],
-            'credit_type':[]
-        }
-
-        url = f'https://api.themoviedb.org/3/movie/{movie_id}?api_key={API_KEY}'
-        movies = response_json(f'{url}&append_to_response=credits')
-
-        #get imdb id of movie for merging with imdb datasets
-        df_structure['imdb_id'] = movies['imdb_id']
-
-        #get cast and crew info
-        casts = movies['credits']['cast']
-        crews = movies['credits']['crew']
-
-        for cast in casts:
-            df_structure['gender'].append(cast['gender'])
-            df_structure['tmdb_person_id'].append(cast['id'])
-            df_structure['department'].append(cast['known_for_department'])
-            df_structure['name'].append(cast['name'])
-            df_structure['job'].append('Actor')
-            df_structure['credit_type'].append('cast')
-
-        for crew in crews:
-            df_structure['gender'].append(crew['gender'])
-            df_structure['tmdb_person_id'].append(crew['id'])
-            df_structure['department'].append(crew['known_for_department'])
-            df_structure['name'].append(crew['name'])
-            df_structure['job'].append(crew['job'])
-            df_structure['credit_type'].append('crew')
-
-        #convert to dataframe and append to list
-        df_list.append(pd.DataFrame(df_structure))
+    done_movies = journal.done_movies()
+    tmdb_ids = [movie_id for movie_id in tmdb_ids 
+                if movie_id not in done_movies]
 
-        #log update
-        print(f"Scraped cast and crew info for {movie_id}")
+    urls = [f'{API_ROOT}/movie/{movie_id}?api_key={API_KEY}'
+            '&append_to_response=credits' for movie_id in tmdb_ids]
 
-        #delay next request
-        time.sleep(delay)
+    #credits are streamed to parquet row groups instead of dataframes.
+    #Every flush is its own part, so movies are marked done in the
+    #journal after each flush and a crash loses at most one flush.
+    writer = CreditsWriter(journal.directory, journal.add_movies, flush_every,
+                           row_groups_per_file=1)
+    responses = fetch_all(urls, max_workers, rate_limiter, cache)
 
-        if (index % 50 == 0) and (index != 0):
-            print("Delaying for another 25 seconds...")
-            time.sleep(25)
+    for movie_id, (_, movies) in zip(tmdb_ids, responses):
+        if movies == "REQUEST ERROR":
+            print(f"Failed to get cast and crew info for {movie_id}")
+            failures += 1
+            continue
 
-    df_tmdb = pd.concat(df_list).reset_index(drop=True)
-
-    print("DONE: Collected cast and crew info for each movie")
+        writer.add_movie(movie_id, movies)
 
-    #delay next part by 1 minute
-    time.sleep(60)
+        #log update
+        print(f"Scraped cast and crew info for {movie_id}")
 
-    #get tmdb person ids
-    ids = df_tmdb['tmdb_person_id'].to_list()
+    writer.close()
 
-    #empty list to store imdb person ids
-    imdb_people = []
+    print("DONE: Collected cast and crew info for each movie")
 
     # (4) get imdb id of each crew and cast of each movie
     print("START: Getting imdb person id for each crew and cast...")
 
-    for id in ids:
-        url = f'https://api.themoviedb.org/3/person/{id}/external_ids?api_key={API_KEY}'
-        person = response_json(f'{url}')
+    parts = journal.parts()
+    persons = read_persons(journal.directory, parts)
 
-        #add to list
-        imdb_people.append(person['imdb_id'])
+    person_ids = resolve_person_ids(persons['tmdb_person_id'], API_KEY,
+                                    person_index, max_workers,
+                                    rate_limiter, cache, flush_every)
 
-        #log update
-        print(f"Extracted imdb person id for tmdb {id}")
+    #people whose request failed are missing from the resolved ids
+    failures += len(persons) - len(person_ids)
 
-        #delay next request
-        time.sleep(delay)
+    #update persons table which is joined to every credits chunk
+    persons = persons.merge(person_ids, on='tmdb_person_id', how='left')
+    journal.set_failures(failures)
+    journal.close()
 
-    #update final dataframe
-    df_tmdb['imdb_person_id'] = imdb_people
+    if failures > 0:
+        print(f"WARNING: {failures} requests failed, run again to retry them")
+
+    credits = iter_credits(journal.directory, parts, persons)
+
+    if as_iterator:
+        print("DONE: Credits ready to be read in chunks\n")
+        return credits
+
+    #no movie data was collected
+    if len(parts) == 0:
+        raise ValueError("No credits were collected")
+
+    df_tmdb = pd.concat(credits).reset_index(drop=True)
 
     print("DONE: Dataframe created and updated\n")
 
     return df_tmdb
 
 
-if __name__=='__main__':
+#global rate limiter of a worker process, set by init_worker
+worker_limiter = None
 
-    config = ConfigParser()
-    config.read('/home/jdtganding/Documents/bechdel-movies-project/api_keys.cfg')
-    API_KEY = config.get('tmdb', 'api_key')
 
-    path = '/home/jdtganding/Documents/bechdel-movies-project/data/tmdb'
+def init_worker(rate_limiter):
+    """
+    Initializer of the process pool which shares one rate limiter
+    """
 
-    for year in range(1900, 1911):
+    global worker_limiter
+    worker_limiter = rate_limiter
 
-        try:
-            df = get_tmdb_data(API_KEY=API_KEY, from_year=year, to_year=year)
 
-            #save final dataframe as a csv file
-            df.to_csv(f'{path}/TMDBResults_{year}.csv', index=False)
+def scrape_shard(API_KEY, name, windows, output_dir, max_workers=8,
+                 cache_path=None, person_index=None):
+    """
+    Scrapes the release date windows of one shard inside a worker
+    process and writes its credits into a single Parquet file.
+
+    Arguments:
+        - API_KEY: the generated API key from the tmdb API
+        - name: name of the shard, used for its file and journal
+        - windows: list of (start, end, pages) windows of the shard
+        - output_dir: folder of the Parquet files
+        - max_workers: number of requests kept in flight per process
+        - cache_path: path of the ResponseCache database.
+                      Default set to None (no caching).
+        - person_index: csv path of the person index shared by all
+                        shards. Default set to None which will keep
+                        one index per shard.
+
+    Returns:
+        dictionary entry for the manifest, whose failures are the
+        requests still pending in the journal of the shard
+    """
+
+    started = time.time()
+    path = os.path.join(output_dir, f'{name}.parquet')
+    cache = None if cache_path is None else ResponseCache(cache_path)
+
+    credits = get_tmdb_data(API_KEY, max_workers=max_workers,
+                            rate_limiter=worker_limiter, cache=cache,
+                            person_index=person_index,
+                            journal_dir=os.path.join(output_dir, '_journal', name),
+                            windows=windows, as_iterator=True)
+
+    rows = 0
+    writer = None
+
+    for df in credits:
+        if writer is None:
+            #same dictionary index type for every chunk of the file
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            schema = pa.schema([pa.field(field.name, CATEGORY)
+                                if pa.types.is_dictionary(field.type)
+                                else field for field in schema])
+            writer = pq.ParquetWriter(f'{path}.tmp', schema,
+                                      compression='zstd')
+
+        writer.write_table(pa.Table.from_pandas(df, schema=schema,
+                                                preserve_index=False))
+        rows += len(df)
+
+    if writer is not None:
+        writer.close()
+        os.replace(f'{path}.tmp', path)
+
+    journal = ScrapeJournal(os.path.join(output_dir, '_journal', name))
+    failures = journal.failures
+
+    if failures == 0:
+        journal.mark_finished()
+    journal.close()
+
+    return {
+        'shard': name,
+        'file': os.path.basename(path) if rows > 0 else None,
+        'first_date': str(windows[0][0]),
+        'last_date': str(windows[-1][1]),
+        'windows': len(windows),
+        'pages': sum(pages for _, _, pages in windows),
+        'rows': rows,
+        'failures': failures,
+        'seconds': round(time.time() - started, 1)
+    }
+
+
+def write_json(path, data):
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(data, file, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+
+def run_sharded_scrape(API_KEY, from_year, to_year, output_dir, workers=4,
+                       num_shards=None, max_workers=8, rate=40,
+                       cache_path=None):
+    """
+    Scrapes a year range with a pool of processes. The years are
+    planned into release date windows which are packed into shards
+    of similar size; every shard becomes one Parquet file. All
+    processes draw from one global rate limiter. Finished shards
+    are skipped when the command is run again.
+
+    Arguments:
+        - API_KEY: the generated API key from the tmdb API
+        - from_year: beginning year to start collecting movie data
+        - to_year: final year to end collecting movie data
+        - output_dir: folder of the Parquet files and the manifest
+        - workers: number of processes. Default set to 4.
+        - num_shards: number of shards. Default set to None which
+                      will use four shards per process.
+        - max_workers: number of requests kept in flight per process.
+                       Default set to 8.
+        - rate: maximum requests per second across all processes.
+                Default set to 40.
+        - cache_path: path of the ResponseCache database.
+                      Default set to None (no caching).
+
+    Returns:
+        manifest dictionary with row counts and timings per shard
+    """
+
+    started = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+
+    rate_limiter = SharedTokenBucket(rate)
+    plan_path = os.path.join(output_dir, '_plan.json')
+    manifest_path = os.path.join(output_dir, '_manifest.json')
+
+    #people are resolved once for all shards
+    person_index = os.path.join(output_dir, '_person_index.csv')
+
+    # (1) plan the shards once so they stay the same across restarts
+    if os.path.exists(plan_path):
+        with open(plan_path) as file:
+            plan = json.load(file)
+
+        #a plan of another range would silently scrape the old range.
+        #The default number of shards follows the workers, which may
+        #change between runs, so only an explicit number is checked.
+        arguments = {'from_year': from_year, 'to_year': to_year}
+        if num_shards is not None:
+            arguments['num_shards'] = num_shards
+
+        different = {key: plan[key] for key, value in arguments.items()
+                     if key in plan and plan[key] != value}
+        if len(different) > 0:
+            raise ValueError(f"{plan_path} was planned with {different}, "
+                             "use another output folder for new arguments")
+
+        shards = {name: [(date.fromisoformat(start), date.fromisoformat(end), 
+                          pages) for start, end, pages in windows]
+                  for name, windows in plan['shards'].items()}
+
+        planned_on = plan.get('planned_on', str(date.today()))
+
+        print(f"Using the {len(shards)} shards planned in {plan_path}")
+
+    else:
+        cache = None if cache_path is None else ResponseCache(cache_path)
+        windows, failed = plan_discovery(API_KEY, range(from_year, to_year+1),
+                                         max_workers=max_workers,
+                                         rate_limiter=rate_limiter,
+                                         cache=cache)
+        if len(failed) > 0:
+            raise RuntimeError(f"Could not plan years {sorted(failed)}")
+
+        num_shards = num_shards or workers*4
+        shards = plan_shards(windows, num_shards)
+        shards = {f'shard-{index:04}': shard 
+                  for index, shard in enumerate(shards)}
+        planned_on = str(date.today())
+
+        write_json(plan_path, {
+            'from_year': from_year,
+            'to_year': to_year,
+            'num_shards': num_shards,
+            'planned_on': planned_on,
+            'shards': {name: [(str(start), str(end), pages)
+                              for start, end, pages in shard]
+                       for name, shard in shards.items()}
+        })
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    else:
+        manifest = {'from_year': from_year, 'to_year': to_year, 'shards': {}}
+
+    # (2) scrape the unfinished shards in parallel
+    todo = {name: windows for name, windows in shards.items()
+            if name not in manifest['shards']}
+
+    print(f"START: Scraping {len(todo)} of {len(shards)} shards "
+          f"with {workers} processes...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(rate_limiter,)) as executor:
+        futures = [executor.submit(scrape_shard, API_KEY, name, windows,
+                                   output_dir, max_workers, cache_path,
+                                   person_index)
+                   for name, windows in todo.items()]
+
+        for future in as_completed(futures):
+            entry = future.result()
 
-        except ValueError:
-            print(f"No data for year {year}\n")
-            pass
+            #shards with failed requests are resumed on the next run
+            if entry['failures'] > 0:
+                print(f"Unfinished {entry['shard']} with {entry['failures']} "
+                      "failed requests, run again to retry them")
+                continue
+
+            manifest['shards'][entry['shard']] = entry
+
+            #save progress after every shard
+            write_json(manifest_path, manifest)
+
+            print(f"Finished {entry['shard']} with {entry['rows']} rows "
+                  f"in {entry['seconds']} seconds")
+
+    manifest['rows'] = sum(entry['rows'] for entry in manifest['shards'].values())
+    manifest['seconds'] = round(time.time() - started, 1)
+    write_json(manifest_path, manifest)
+
+    unfinished = len(shards) - len(manifest['shards'])
+    state_path = os.path.join(output_dir, STATE_FILE)
+
+    if unfinished > 0:
+        print(f"WARNING: {unfinished} shards are unfinished")
+
+    #the first refresh reads the changes made since the scrape started
+    elif not os.path.exists(state_path):
+        write_json(state_path, {'last_run': planned_on})
+
+    print(f"DONE: Scraped {manifest['rows']} rows into {output_dir}\n")
+
+    return manifest
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(
+                description="Scrape TMDB movie credits into Parquet files")
+    parser.add_argument('--from-year', type=int, default=1874,
+                        help="first release year to scrape")
+    parser.add_argument('--to-year', type=int, default=date.today().year,
+                        help="last release year to scrape")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="number of worker processes")
+    parser.add_argument('--threads', type=int, default=8,
+                        help="requests in flight per worker process")
+    parser.add_argument('--shards', type=int, default=None,
+                        help="number of shards, default is 4 per worker")
+    parser.add_argument('--rate', type=float, default=40,
+                        help="maximum requests per second for all workers")
+    parser.add_argument('--output-dir', required=True,
+                        help="folder of the Parquet files and manifest")
+    parser.add_argument('--config', default='api_keys.cfg',
+                        help="config file with the [tmdb] api_key")
+    parser.add_argument('--cache', default=None,
+                        help="path of the response cache database")
+    args = parser.parse_args()
+
+    config = ConfigParser()
+    config.read(args.config)
+    API_KEY = config.get('tmdb', 'api_key')
 
-        #delay next request by 1 min
-        time.sleep(60)
\ No newline at end of file
+    run_sharded_scrape(API_KEY, args.from_year, args.to_year,
+                       args.output_dir, workers=args.workers,
+                       num_shards=args.shards, max_workers=args.threads,
+                       rate=args.rate, cache_path=args.cache)
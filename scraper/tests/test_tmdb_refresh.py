@@ -0,0 +1,84 @@
+"""----------------------------------------------------------------------
+Tests of the incremental TMDB refresh with a stand-in for the API,
+where a stored file only has changed people and no changed movies.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tmdb_refresh
+from tmdb_writer import CATEGORY
+
+SCHEMA = pa.schema([
+    ('tmdb_id', pa.int32()),
+    ('imdb_id', pa.string()),
+    ('tmdb_person_id', pa.int32()),
+    ('name', pa.string()),
+    ('gender', pa.int8()),
+    ('department', CATEGORY),
+    ('job', CATEGORY),
+    ('credit_type', CATEGORY),
+    ('imdb_person_id', pa.string()),
+])
+
+#person 11 changed name, gender and department, no movie changed
+PERSON = {'name': 'Renamed', 'gender': 1, 'known_for_department': 'Directing',
+          'external_ids': {'imdb_id': 'nm0000011'}}
+
+
+def fake_fetch_all(urls, max_workers=8, rate_limiter=None, cache=None):
+    for url in urls:
+        if '/person/changes' in url:
+            yield url, {'results': [{'id': 11}], 'total_pages': 1}
+        elif '/changes' in url:
+            yield url, {'results': [], 'total_pages': 1}
+        elif '/person/11' in url:
+            yield url, PERSON
+        else:
+            yield url, "REQUEST ERROR"
+
+
+def write_credits(path, rows):
+    table = pa.Table.from_pylist(rows, SCHEMA)
+    pq.write_table(table, path)
+
+
+def credit(tmdb_id, person_id, name):
+    return {'tmdb_id': tmdb_id, 'imdb_id': f'tt{tmdb_id:07}',
+            'tmdb_person_id': person_id, 'name': name, 'gender': 2,
+            'department': 'Acting', 'job': 'Actor', 'credit_type': 'cast',
+            'imdb_person_id': f'nm{person_id:07}'}
+
+
+def test_refresh_only_person_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(tmdb_refresh, 'fetch_all', fake_fetch_all)
+
+    write_credits(tmp_path / 'shard-0000.parquet',
+                  [credit(1, 10, 'Kept'), credit(1, 11, 'Old name')])
+    write_credits(tmp_path / 'shard-0001.parquet',
+                  [credit(2, 12, 'Other')])
+
+    result = tmdb_refresh.refresh_tmdb_data('KEY', str(tmp_path),
+                                            since=date(2026, 10, 1))
+    assert result == {'movies': 0, 'people': 1}
+
+    df = pd.read_parquet(tmp_path / 'shard-0000.parquet')
+    person = df[df['tmdb_person_id'] == 11].iloc[0]
+    assert person['name'] == 'Renamed'
+    assert person['gender'] == 1
+    assert person['department'] == 'Directing'
+    assert df[df['tmdb_person_id'] == 10].iloc[0]['name'] == 'Kept'
+
+    #stored types are kept and no temporary file is left behind
+    assert df['gender'].dtype == 'int8'
+    assert isinstance(df['department'].dtype, pd.CategoricalDtype)
+    assert sorted(os.listdir(tmp_path)) == ['_refresh_state.json',
+                                            'shard-0000.parquet',
+                                            'shard-0001.parquet']
@@ -0,0 +1,252 @@
+"""----------------------------------------------------------------------
+Persistent SQLite cache for TMDB API responses. Entries are keyed by
+the normalized url (without the API key), expire according to
+per-endpoint TTLs, are revalidated with ETag/Last-Modified and are
+evicted in least-recently-used order once the cache grows too large.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import re
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+#time to live in seconds per endpoint; the first matching pattern wins
+DEFAULT_TTLS = {
+    r'/(movie|person)/changes$': 0,
+    r'/discover/movie$': 7 * 24 * 3600,
+    r'/person/\d+/external_ids$': 180 * 24 * 3600,
+    r'/movie/\d+$': 30 * 24 * 3600,
+}
+
+#query parameters that should never be part of a cache key
+PRIVATE_PARAMS = {'api_key'}
+
+
+def normalize_url(url):
+    """
+    Normalizes a url into a cache key by removing the API key
+    and sorting the remaining query parameters.
+
+    Arguments:
+        url: the API url
+
+    Returns:
+        normalized url string
+    """
+
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query)
+                   if key not in PRIVATE_PARAMS)
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path.rstrip('/'), urlencode(query), ''))
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of json responses that can be shared by
+    the threads of the TMDB client.
+
+    Arguments:
+        - path: location of the SQLite database file
+        - ttls: dictionary of endpoint regex pattern and time to live
+                in seconds. Default set to DEFAULT_TTLS.
+        - default_ttl: time to live of urls not matching any pattern.
+                       Default set to 1 day.
+        - max_bytes: maximum size of stored responses before the least
+                     recently used ones are evicted. Default set to 2 GB.
+        - offline: if True, cached responses are always used and the
+                   network is never called. Default set to False.
+        - timeout: seconds to wait for a write lock held by another
+                   process sharing the file. Default set to 60.
+    """
+
+    def __init__(self, path='./tmdb_cache.sqlite', ttls=None,
+                 default_ttl=24*3600, max_bytes=2*1024**3, offline=False,
+                 timeout=60):
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl
+                     in (ttls or DEFAULT_TTLS).items()]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+
+        #worker processes of a sharded scrape share one database file,
+        #WAL lets them read while one of them writes
+        self.conn = sqlite3.connect(path, timeout=timeout,
+                                    check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS responses_accessed
+            ON responses (accessed_at)""")
+        self.conn.commit()
+
+        #the total size is kept up to date by triggers in the same
+        #transaction as every change, so eviction never scans the table.
+        #A cache from before the triggers is summed up once.
+        self.conn.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS totals (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO totals
+                SELECT 'size', COALESCE(SUM(size), 0) FROM responses;
+            CREATE TRIGGER IF NOT EXISTS responses_insert
+            AFTER INSERT ON responses BEGIN
+                UPDATE totals SET value = value + new.size WHERE name = 'size';
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_update
+            AFTER UPDATE OF size ON responses BEGIN
+                UPDATE totals SET value = value + new.size - old.size
+                WHERE name = 'size';
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_delete
+            AFTER DELETE ON responses BEGIN
+                UPDATE totals SET value = value - old.size WHERE name = 'size';
+            END;
+            COMMIT;
+        """)
+
+    def ttl(self, key):
+        """
+        Returns the time to live in seconds of a cache key
+        """
+
+        path = urlsplit(key).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key):
+        """
+        Looks up a cache key and marks it as recently used.
+
+        Arguments:
+            key: normalized url
+
+        Returns:
+            dictionary with the json body, etag, last_modified and
+            whether the entry is still fresh. None if not cached.
+        """
+
+        with self.lock:
+            row = self.conn.execute(
+                """SELECT body, etag, last_modified, fetched_at
+                   FROM responses WHERE key = ?""", (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key))
+            self.conn.commit()
+
+        body, etag, last_modified, fetched_at = row
+        return {
+            'json': json.loads(zlib.decompress(body)),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': time.time() - fetched_at < self.ttl(key)
+        }
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """
+        Stores a json response and evicts old entries if needed.
+
+        Arguments:
+            - key: normalized url
+            - data: json object of the response
+            - etag: ETag header of the response
+            - last_modified: Last-Modified header of the response
+        """
+
+        body = zlib.compress(json.dumps(data).encode('utf-8'))
+        now = time.time()
+
+        with self.lock:
+            #an upsert instead of REPLACE, whose implicit delete
+            #would not fire the size trigger
+            self.conn.execute(
+                """INSERT INTO responses
+                   (key, body, size, etag, last_modified,
+                    fetched_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET
+                       body = excluded.body, size = excluded.size,
+                       etag = excluded.etag,
+                       last_modified = excluded.last_modified,
+                       fetched_at = excluded.fetched_at,
+                       accessed_at = excluded.accessed_at""",
+                (key, body, len(body), etag, last_modified, now, now))
+            self.evict()
+            self.conn.commit()
+
+    def touch(self, key):
+        """
+        Marks a cached response as fresh again, e.g. after the
+        server answered a conditional request with 304
+        """
+
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                """UPDATE responses SET fetched_at = ?, accessed_at = ?
+                   WHERE key = ?""", (now, now, key))
+            self.conn.commit()
+
+    def invalidate(self, url):
+        """
+        Removes the cached response of a url, e.g. when TMDB reports
+        that the resource changed
+        """
+
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE key = ?",
+                              (normalize_url(url),))
+            self.conn.commit()
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the total size
+        is under max_bytes. Must be called while holding the lock.
+        """
+
+        total = self.conn.execute(
+            "SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at")
+
+        expired = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", expired)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,249 @@
+"""----------------------------------------------------------------------
+Concurrent client for The Movie Database API. Requests are spread over
+a small thread pool and throttled by a shared token bucket, so overall
+throughput follows the API rate limit instead of fixed sleeps.
+Connections come from the shared pooled transport (http_transport).
+Responses can optionally be kept in a persistent cache (tmdb_cache).
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import time
+import threading
+import multiprocessing
+import requests
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from tmdb_cache import normalize_url
+from http_transport import DEFAULT_TIMEOUT, get_session
+
+#can point to a local stand-in server when testing
+API_ROOT = os.environ.get('TMDB_API_ROOT', 'https://api.themoviedb.org/3')
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to throttle API requests. TMDB
+    allows around 50 requests per second per IP, so the default
+    stays slightly below that.
+
+    Arguments:
+        - rate: number of requests allowed per period.
+                Default set to 40.
+        - per: length of the period in seconds.
+               Default set to 1 second.
+        - capacity: maximum burst of requests.
+                    Default set to None which will use rate.
+    """
+
+    def __init__(self, rate=40, per=1.0, capacity=None):
+        self.fill_rate = rate / per
+        self.capacity = capacity or rate
+        self.lock = threading.Lock()
+
+        #state holds the available tokens and the last refill time
+        self.state = [float(self.capacity), time.monotonic()]
+
+    def acquire(self):
+        """
+        Blocks until a token is available and consumes it
+        """
+
+        state = self.state
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens, updated = state[0], state[1]
+
+                #refill according to elapsed time
+                if now > updated:
+                    tokens = min(self.capacity,
+                                 tokens + (now - updated)*self.fill_rate)
+                    updated = now
+
+                if tokens >= 1:
+                    state[0], state[1] = tokens - 1, updated
+                    return
+
+                state[0], state[1] = tokens, updated
+                wait = max(updated - now, 0) \
+                       + (1 - tokens) / self.fill_rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Empties the bucket and holds all requests for the given
+        number of seconds (e.g. from a Retry-After header)
+        """
+
+        with self.lock:
+            resume = time.monotonic() + seconds
+            self.state[0] = 0
+            self.state[1] = max(self.state[1], resume)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket kept in shared memory so that the processes of a
+    multiprocessing pool draw from one global rate limit. It has
+    to be created before the pool and passed to its workers.
+
+    Arguments:
+        - rate: number of requests allowed per period.
+                Default set to 40.
+        - per: length of the period in seconds.
+               Default set to 1 second.
+        - capacity: maximum burst of requests.
+                    Default set to None which will use rate.
+    """
+
+    def __init__(self, rate=40, per=1.0, capacity=None):
+        super().__init__(rate, per, capacity)
+        self.lock = multiprocessing.Lock()
+        self.state = multiprocessing.Array('d', self.state, lock=False)
+
+
+def retry_after_seconds(response, default=10):
+    """
+    Reads the Retry-After header of a response, which can
+    either be in seconds or an HTTP date.
+
+    Arguments:
+        - response: requests response object
+        - default: seconds to use if the header is missing
+
+    Returns:
+        number of seconds to wait
+    """
+
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return default
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        now = datetime.now(timezone.utc)
+        return max((retry_at - now).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+def response_json(API_URL, rate_limiter=None, cache=None, 
+                  retries=3, timeout=DEFAULT_TIMEOUT):
+    """
+    Uses Python requests to get content of specified url. If the
+    API answers with 429, waits for Retry-After before trying again.
+    Fresh responses are served from the cache, and stale ones are
+    revalidated with a conditional request.
+
+    Arguments:
+        - API_URL: url of API
+        - rate_limiter: TokenBucket shared by all requests.
+                        Default set to None (no throttling).
+        - cache: ResponseCache to read and store responses.
+                 Default set to None (no caching).
+        - retries: number of retries for 429 responses
+        - timeout: (connect, read) timeout in seconds
+
+    Returns:
+        json object of the response.
+        If status code error, returns "REQUEST ERROR" string
+    """
+
+    headers = {}
+    cached = None
+
+    if cache is not None:
+        key = normalize_url(API_URL)
+        cached = cache.get(key)
+
+        if cached is not None and (cached['fresh'] or cache.offline):
+            return cached['json']
+        elif cache.offline:
+            return "REQUEST ERROR"
+
+        #revalidate stale entry instead of downloading it again
+        if cached is not None and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached is not None and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    session = get_session()
+
+    for attempt in range(retries+1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        #connection errors and 5xx are already retried by the transport
+        try:
+            response = session.get(API_URL, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            break
+
+        if response.status_code==200:
+            data = response.json()
+            if cache is not None:
+                cache.put(key, data,
+                          etag=response.headers.get('ETag'),
+                          last_modified=response.headers.get('Last-Modified'))
+            return data
+
+        elif response.status_code==304 and cached is not None:
+            cache.touch(key)
+            return cached['json']
+
+        elif response.status_code==429:
+            wait = retry_after_seconds(response)
+            if rate_limiter is not None:
+                rate_limiter.pause(wait)
+            else:
+                time.sleep(wait)
+
+        else:
+            break
+
+    return "REQUEST ERROR"
+
+
+def fetch_all(urls, max_workers=8, rate_limiter=None, cache=None):
+    """
+    Fetches urls concurrently while keeping at most a bounded
+    number of requests in flight. Results are yielded in the
+    same order as the given urls.
+
+    Arguments:
+        - urls: iterable of API urls
+        - max_workers: number of concurrent requests
+        - rate_limiter: TokenBucket shared by all requests
+        - cache: ResponseCache shared by all requests
+
+    Returns:
+        generator of (url, json response) tuples
+    """
+
+    window = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        for url in urls:
+            future = executor.submit(response_json, url, rate_limiter, cache)
+            pending.append((url, future))
+
+            #keep memory bounded by draining the oldest request
+            if len(pending) >= window:
+                url_done, future_done = pending.popleft()
+                yield url_done, future_done.result()
+
+        for url_done, future_done in pending:
+            yield url_done, future_done.result()
@@ -0,0 +1,224 @@
+"""----------------------------------------------------------------------
+Durable progress journal for long TMDB scrapes. The journal records
+the planned release-date windows, the completed discover pages, the
+collected movie ids, the movies whose credits were committed to disk
+and whether the whole shard finished, so that a restarted scrape can
+resume exactly where it stopped.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import time
+import shutil
+import sqlite3
+import threading
+from datetime import date
+
+#version of the journal tables, kept in the user_version of the
+#database. A journal of another version is rebuilt from scratch.
+SCHEMA_VERSION = 2
+
+
+class ScrapeJournal:
+    """
+    SQLite progress journal plus a folder of partial results.
+
+    Arguments:
+        directory: folder where the journal database, the person
+                   index and the credits part files are kept
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.person_index = os.path.join(directory, 'person_index.csv')
+        os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, 'journal.sqlite'),
+                                    check_same_thread=False)
+
+        #progress of an older layout, e.g. pages counted per year,
+        #cannot be read, so the shard starts over
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = self.conn.execute("""SELECT name FROM sqlite_master
+                                      WHERE type = 'table'""").fetchall()
+
+        if version != SCHEMA_VERSION and len(tables) > 0:
+            print(f"Rebuilding journal of version {version} in {directory}")
+            for (table,) in tables:
+                self.conn.execute(f'DROP TABLE "{table}"')
+
+            #part files are only known through the dropped movies table
+            for folder in ['credits', 'persons']:
+                shutil.rmtree(os.path.join(directory, folder),
+                              ignore_errors=True)
+
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS years (
+                year INTEGER PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS windows (
+                start TEXT PRIMARY KEY,
+                end TEXT NOT NULL,
+                pages INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                start TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                PRIMARY KEY (start, page)
+            );
+            CREATE TABLE IF NOT EXISTS discovered (
+                tmdb_id INTEGER PRIMARY KEY,
+                start TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS movies (
+                tmdb_id INTEGER PRIMARY KEY,
+                part TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def execute(self, query, params=()):
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+            self.conn.commit()
+        return rows
+
+    def executemany(self, query, params):
+        with self.lock:
+            self.conn.executemany(query, params)
+            self.conn.commit()
+
+    def planned_years(self):
+        """
+        Returns set of years already split into release-date windows
+        """
+
+        return {row[0] for row in self.execute("SELECT year FROM years")}
+
+    def add_windows(self, years, windows):
+        """
+        Records the planned release-date windows and marks their
+        years as planned in a single transaction.
+
+        Arguments:
+            - years: years covered by the windows
+            - windows: list of (start, end, pages) tuples of dates
+        """
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO windows VALUES (?, ?, ?)",
+                [(str(start), str(end), pages) 
+                 for start, end, pages in windows])
+            self.conn.executemany("INSERT OR IGNORE INTO years VALUES (?)",
+                                  [(year,) for year in years])
+            self.conn.commit()
+
+    def windows(self, from_year, to_year):
+        """
+        Returns list of (start, end, pages) windows within the
+        year range, with start and end as date objects
+        """
+
+        rows = self.execute("""SELECT start, end, pages FROM windows
+                               WHERE start BETWEEN ? AND ?
+                               ORDER BY start""",
+                            (f'{from_year}-01-01', f'{to_year}-12-31'))
+
+        return [(date.fromisoformat(start), date.fromisoformat(end), pages)
+                for start, end, pages in rows]
+
+    def done_pages(self):
+        """
+        Returns set of (window start, page) tuples already collected
+        """
+
+        return {(date.fromisoformat(start), page) for start, page
+                in self.execute("SELECT start, page FROM pages")}
+
+    def add_page(self, start, page, tmdb_ids):
+        """
+        Records the movie ids of a discover page and marks the
+        page as done in a single transaction
+        """
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO discovered VALUES (?, ?)",
+                [(tmdb_id, str(start)) for tmdb_id in tmdb_ids])
+            self.conn.execute("INSERT OR IGNORE INTO pages VALUES (?, ?)",
+                              (str(start), page))
+            self.conn.commit()
+
+    def discovered_ids(self, starts):
+        """
+        Returns list of collected movie ids of the given windows
+        in discovery order
+        """
+
+        starts = {str(start) for start in starts}
+        rows = self.execute("SELECT tmdb_id, start FROM discovered ORDER BY rowid")
+        return [tmdb_id for tmdb_id, start in rows if start in starts]
+
+    def done_movies(self):
+        """
+        Returns set of movie ids whose credits were committed to disk
+        """
+
+        return {row[0] for row in self.execute("SELECT tmdb_id FROM movies")}
+
+    def add_movies(self, part, tmdb_ids):
+        """
+        Marks movies as done once the part file containing their
+        credits was closed. A crash before this only means the
+        movies are fetched again.
+
+        Arguments:
+            - part: name of the committed part file
+            - tmdb_ids: movie ids included in the part file
+        """
+
+        self.executemany("INSERT OR REPLACE INTO movies VALUES (?, ?)",
+                         [(tmdb_id, part) for tmdb_id in tmdb_ids])
+
+    def parts(self):
+        """
+        Returns sorted list of committed part file names
+        """
+
+        rows = self.execute("SELECT DISTINCT part FROM movies ORDER BY part")
+        return [row[0] for row in rows]
+
+    @property
+    def failures(self):
+        """
+        Number of requests which failed in the last run and are
+        still pending
+        """
+
+        rows = self.execute("SELECT value FROM meta WHERE key = 'failures'")
+        return int(rows[0][0]) if len(rows) > 0 else 0
+
+    def set_failures(self, count):
+        self.execute("INSERT OR REPLACE INTO meta VALUES ('failures', ?)",
+                     (str(count),))
+
+    @property
+    def finished(self):
+        rows = self.execute("SELECT value FROM meta WHERE key = 'finished'")
+        return len(rows) > 0
+
+    def mark_finished(self):
+        self.execute("INSERT OR REPLACE INTO meta VALUES ('finished', ?)",
+                     (str(time.time()),))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
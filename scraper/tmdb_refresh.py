@@ -0,0 +1,314 @@
+"""----------------------------------------------------------------------
+Incremental refresh of stored TMDB credits. Reads the movie and person
+changes feeds since the last successful run, re-fetches only the
+affected movies and people and merges them into the stored Parquet
+files by tmdb_id.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import glob
+import json
+import argparse
+import tempfile
+import pandas as pd
+from datetime import date, timedelta
+from configparser import ConfigParser
+from tmdb_writer import CreditsWriter, read_persons, iter_credits
+from tmdb_client import API_ROOT, TokenBucket, fetch_all
+from scrape_tmdb_data import STATE_FILE, resolve_person_ids
+
+#the changes endpoints only accept ranges of up to 14 days
+CHANGES_MAX_DAYS = 14
+
+
+def get_changed_ids(API_KEY, kind, start_date, end_date,
+                    max_workers=8, rate_limiter=None):
+    """
+    Collects the ids listed in a TMDB changes feed.
+
+    Arguments:
+        - API_KEY: the generated API key from the tmdb API
+        - kind: either 'movie' or 'person'
+        - start_date: first date to include
+        - end_date: last date to include
+        - max_workers: number of requests kept in flight
+        - rate_limiter: TokenBucket shared by all requests
+
+    Returns:
+        set of changed ids, and whether all requests succeeded
+    """
+
+    url = f'{API_ROOT}/{kind}/changes?api_key={API_KEY}'
+
+    #split the range into the maximum span allowed by the API
+    ranges = []
+    start = start_date
+    while start <= end_date:
+        end = min(start + timedelta(days=CHANGES_MAX_DAYS-1), end_date)
+        ranges.append(f'{url}&start_date={start}&end_date={end}')
+        start = end + timedelta(days=1)
+
+    ids = set()
+    complete = True
+    remaining = []
+
+    for range_url, changes in fetch_all(ranges, max_workers,
+                                        rate_limiter):
+        if changes == "REQUEST ERROR":
+            complete = False
+            continue
+
+        ids.update(change['id'] for change in changes['results'])
+        remaining += [f'{range_url}&page={page}'
+                      for page in range(2, changes['total_pages']+1)]
+
+    for _, changes in fetch_all(remaining, max_workers, rate_limiter):
+        if changes == "REQUEST ERROR":
+            complete = False
+            continue
+
+        ids.update(change['id'] for change in changes['results'])
+
+    print(f"{len(ids)} {kind} changes from {start_date} to {end_date}")
+
+    return ids, complete
+
+
+def read_refresh_state(dataset_dir):
+    path = os.path.join(dataset_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_refresh_state(dataset_dir, state):
+    path = os.path.join(dataset_dir, STATE_FILE)
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(state, file)
+    os.replace(f'{path}.tmp', path)
+
+
+def refresh_tmdb_data(API_KEY, dataset_dir, since=None, person_index=None,
+                      max_workers=8, rate_limiter=None, cache=None):
+    """
+    Updates the stored credits with the TMDB changes feeds. Only
+    movies and people already in the dataset are re-fetched.
+
+    Arguments:
+        - API_KEY: the generated API key from the tmdb API
+        - dataset_dir: folder of Parquet files in the format returned
+                       by get_tmdb_data
+        - since: first date of changes to read. Default set to None
+                 which will use the date of the last successful refresh,
+                 or the planning date of the full scrape before it.
+        - person_index: csv path of the tmdb to imdb person id index.
+                        Default set to None.
+        - max_workers: number of requests kept in flight.
+                       Default set to 8.
+        - rate_limiter: TokenBucket shared by all requests.
+                        Default set to None which will create one.
+        - cache: ResponseCache whose entries of changed movies and
+                 people are invalidated. Default set to None.
+
+    Returns:
+        dictionary with the number of refreshed movies and people
+    """
+
+    if rate_limiter is None:
+        rate_limiter = TokenBucket()
+
+    state = read_refresh_state(dataset_dir)
+    if since is None and 'last_run' not in state:
+        raise ValueError(f"No previous refresh or finished scrape found in "
+                         f"{dataset_dir}, a start date is needed (--since)")
+
+    start_date = since or date.fromisoformat(state['last_run'])
+    end_date = date.today()
+
+    paths = sorted(path for path in glob.glob(f'{dataset_dir}/*.parquet')
+                   if not os.path.basename(path).startswith('_'))
+
+    #find which stored file contains each movie and person
+    keys = {path: pd.read_parquet(path, columns=['tmdb_id', 'tmdb_person_id'])
+            for path in paths}
+    stored_movies = set().union(*[set(df['tmdb_id']) for df in keys.values()])
+    stored_persons = set().union(*[set(df['tmdb_person_id'])
+                                   for df in keys.values()])
+
+    # (1) read the changes feeds
+    print("START: Reading TMDB changes feeds...")
+
+    movie_changes, movies_complete = get_changed_ids(
+                                        API_KEY, 'movie', start_date, end_date,
+                                        max_workers, rate_limiter)
+    person_changes, persons_complete = get_changed_ids(
+                                        API_KEY, 'person', start_date, end_date,
+                                        max_workers, rate_limiter)
+
+    movie_ids = sorted(movie_changes & stored_movies)
+    person_ids = sorted(person_changes & stored_persons)
+
+    print(f"DONE: {len(movie_ids)} movies and {len(person_ids)} people to refresh")
+
+    # (2) re-fetch the changed movies
+    print("START: Collecting cast and crew info for changed movies...")
+
+    urls = [f'{API_ROOT}/movie/{movie_id}?api_key={API_KEY}'
+            '&append_to_response=credits' for movie_id in movie_ids]
+
+    if cache is not None:
+        for url in urls:
+            cache.invalidate(url)
+
+    refreshed = set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parts = []
+        writer = CreditsWriter(tmp, lambda part, ids: parts.append(part))
+
+        for movie_id, (_, movie) in zip(movie_ids, fetch_all(urls, max_workers,
+                                                             rate_limiter,
+                                                             cache)):
+            if movie == "REQUEST ERROR":
+                print(f"Failed to refresh movie {movie_id}")
+                continue
+
+            writer.add_movie(movie_id, movie)
+            refreshed.add(movie_id)
+
+        writer.close()
+
+        persons = read_persons(tmp, parts)
+        new_credits = list(iter_credits(tmp, parts, persons))
+
+    print("DONE: Collected cast and crew info for changed movies")
+
+    # (3) re-fetch the changed people
+    print("START: Collecting details of changed people...")
+
+    urls = [f'{API_ROOT}/person/{person_id}?api_key={API_KEY}'
+            '&append_to_response=external_ids' for person_id in person_ids]
+
+    people = {'tmdb_person_id':[], 'name':[], 'gender':[],
+              'department':[], 'imdb_person_id':[]}
+
+    for person_id, (_, person) in zip(person_ids, fetch_all(urls, max_workers,
+                                                            rate_limiter)):
+        if person == "REQUEST ERROR":
+            print(f"Failed to refresh person {person_id}")
+            persons_complete = False
+            continue
+
+        people['tmdb_person_id'].append(person_id)
+        people['name'].append(person['name'])
+        people['gender'].append(person['gender'])
+        people['department'].append(person['known_for_department'])
+        people['imdb_person_id'].append(person['external_ids']['imdb_id'])
+
+    people = pd.DataFrame(people).set_index('tmdb_person_id')
+
+    #keep the person index in line with the refreshed people
+    if person_index is not None and os.path.exists(person_index):
+        index = pd.read_csv(person_index, dtype={'imdb_person_id':'string'})
+        index = index[~index['tmdb_person_id'].isin(people.index)]
+        index = pd.concat([index, people['imdb_person_id'].reset_index()])
+        index.to_csv(f'{person_index}.tmp', index=False)
+        os.replace(f'{person_index}.tmp', person_index)
+
+    if len(new_credits) > 0:
+        new_credits = pd.concat(new_credits)
+        new_ids = resolve_person_ids(new_credits['tmdb_person_id'], API_KEY,
+                                     person_index, max_workers,
+                                     rate_limiter, cache)
+        new_credits = new_credits.merge(new_ids, on='tmdb_person_id', how='left')
+    else:
+        new_credits = None
+
+    print("DONE: Collected details of changed people")
+
+    # (4) merge into the stored files by tmdb_id
+    print("START: Merging changes into stored credits...")
+
+    rewritten = []
+
+    try:
+        for path, key in keys.items():
+            file_movies = refreshed.intersection(key['tmdb_id'])
+            has_people = key['tmdb_person_id'].isin(people.index).any()
+
+            if len(file_movies) == 0 and not has_people:
+                continue
+
+            df = pd.read_parquet(path)
+            columns = df.columns
+
+            #categories are rebuilt since refreshed rows can add new values
+            dtypes = {column: 'category'
+                      if isinstance(dtype, pd.CategoricalDtype) else dtype
+                      for column, dtype in df.dtypes.items()}
+
+            #typed columns like the int8 gender or the department
+            #categories cannot take the refreshed values in place
+            df = df.astype(object)
+
+            if len(file_movies) > 0:
+                df = df[~df['tmdb_id'].isin(file_movies)]
+                update = new_credits[new_credits['tmdb_id'].isin(file_movies)]
+                df = pd.concat([df, update[columns].astype(object)])
+
+            #overwrite person details of changed people
+            changed = df['tmdb_person_id'].isin(people.index)
+            for column in people.columns:
+                df.loc[changed, column] = df.loc[changed, 'tmdb_person_id']\
+                                            .map(people[column])
+
+            df = df.reset_index(drop=True).astype(dtypes)
+
+            df.to_parquet(f'{path}.tmp', index=False)
+            rewritten.append(path)
+
+    except Exception:
+        for path in rewritten:
+            os.remove(f'{path}.tmp')
+        raise
+
+    #stored files are only replaced once every merge succeeded
+    for path in rewritten:
+        os.replace(f'{path}.tmp', path)
+        print(f"Updated {os.path.basename(path)}")
+
+    #only move forward if no change could have been missed
+    if movies_complete and persons_complete and len(refreshed)==len(movie_ids):
+        state['last_run'] = str(end_date)
+        save_refresh_state(dataset_dir, state)
+
+    print("DONE: Merged changes into stored credits\n")
+
+    return {'movies': len(refreshed), 'people': len(people)}
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(
+                description="Refresh stored TMDB credits from the changes feeds")
+    parser.add_argument('--dataset-dir', required=True,
+                        help="folder of the Parquet files to refresh")
+    parser.add_argument('--since', type=date.fromisoformat, default=None,
+                        help="first date of changes to read (YYYY-MM-DD), "
+                             "default is the date of the last refresh")
+    parser.add_argument('--person-index', default=None,
+                        help="csv path of the tmdb to imdb person id index")
+    parser.add_argument('--config', default='api_keys.cfg',
+                        help="config file with the [tmdb] api_key")
+    args = parser.parse_args()
+
+    config = ConfigParser()
+    config.read(args.config)
+    API_KEY = config.get('tmdb', 'api_key')
+
+    refresh_tmdb_data(API_KEY, args.dataset_dir, since=args.since,
+                      person_index=args.person_index)
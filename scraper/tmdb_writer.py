@@ -0,0 +1,252 @@
+"""----------------------------------------------------------------------
+Streaming columnar writer for TMDB credits. Credits are appended to
+column buffers and flushed as Parquet row groups, with people split
+into their own table so names are not repeated on every credit row.
+
+Last modified: October 2026
+----------------------------------------------------------------------"""
+
+import os
+import glob
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+#string columns that repeat a lot are dictionary-encoded
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+CREDITS_SCHEMA = pa.schema([
+    ('tmdb_id', pa.int32()),
+    ('imdb_id', pa.string()),
+    ('tmdb_person_id', pa.int32()),
+    ('job', CATEGORY),
+    ('credit_type', CATEGORY),
+])
+
+PERSONS_SCHEMA = pa.schema([
+    ('tmdb_person_id', pa.int32()),
+    ('name', pa.string()),
+    ('gender', pa.int8()),
+    ('department', CATEGORY),
+])
+
+
+class ColumnBuffer:
+    """
+    Python lists per column which are converted into an Arrow
+    table following the given schema.
+
+    Arguments:
+        schema: pyarrow schema of the table
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = {name: [] for name in schema.names}
+
+    def __len__(self):
+        return len(self.columns[self.schema.names[0]])
+
+    def to_table(self):
+        """
+        Builds the Arrow table and empties the buffer
+        """
+
+        arrays = []
+        for field in self.schema:
+            values = self.columns[field.name]
+            if pa.types.is_dictionary(field.type):
+                array = pa.array(values, pa.string()).dictionary_encode()
+            else:
+                array = pa.array(values, field.type)
+            arrays.append(array)
+
+        self.columns = {name: [] for name in self.schema.names}
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+
+class CreditsWriter:
+    """
+    Writes movie credits into Parquet part files. Every flush_every
+    movies become one row group and a part file is closed after
+    row_groups_per_file row groups. Only closed part files are
+    reported through on_commit.
+
+    Arguments:
+        - directory: folder where the credits and persons parts go
+        - on_commit: function called with the part name and the
+                     movie ids in it once a part file is closed
+        - flush_every: number of movies per row group.
+                       Default set to 500.
+        - row_groups_per_file: number of row groups per part file.
+                               Default set to 20.
+        - compression: Parquet compression codec.
+                       Default set to zstd.
+    """
+
+    def __init__(self, directory, on_commit=None, flush_every=500,
+                 row_groups_per_file=20, compression='zstd'):
+        self.credits_dir = os.path.join(directory, 'credits')
+        self.persons_dir = os.path.join(directory, 'persons')
+        self.on_commit = on_commit
+        self.flush_every = flush_every
+        self.row_groups_per_file = row_groups_per_file
+        self.compression = compression
+
+        for folder in [self.credits_dir, self.persons_dir]:
+            os.makedirs(folder, exist_ok=True)
+
+            #unfinished parts of a crashed run are never committed
+            for path in glob.glob(f'{folder}/*.tmp'):
+                os.remove(path)
+
+        self.credits = ColumnBuffer(CREDITS_SCHEMA)
+        self.persons = ColumnBuffer(PERSONS_SCHEMA)
+        self.seen_persons = set()
+
+        self.part = None
+        self.writers = None
+        self.row_groups = 0
+        self.buffer_ids = []
+        self.part_ids = []
+
+    def add_movie(self, movie_id, movie):
+        """
+        Appends the cast and crew of a movie to the column buffers.
+
+        Arguments:
+            - movie_id: tmdb id of the movie
+            - movie: json response of movie/{id} with credits
+        """
+
+        imdb_id = movie['imdb_id']
+        credits = [(cast, 'Actor', 'cast') for cast in movie['credits']['cast']]
+        credits += [(crew, crew['job'], 'crew') for crew in movie['credits']['crew']]
+
+        columns = self.credits.columns
+        for person, job, credit_type in credits:
+            columns['tmdb_id'].append(movie_id)
+            columns['imdb_id'].append(imdb_id)
+            columns['tmdb_person_id'].append(person['id'])
+            columns['job'].append(job)
+            columns['credit_type'].append(credit_type)
+
+            #each person is only written once per run
+            if person['id'] not in self.seen_persons:
+                self.seen_persons.add(person['id'])
+                self.persons.columns['tmdb_person_id'].append(person['id'])
+                self.persons.columns['name'].append(person['name'])
+                self.persons.columns['gender'].append(person['gender'])
+                self.persons.columns['department'].append(
+                                        person['known_for_department'])
+
+        self.buffer_ids.append(movie_id)
+
+        if len(self.buffer_ids) >= self.flush_every:
+            self.flush()
+
+    def open_part(self):
+        self.part = f'part-{time.time_ns()}.parquet'
+        self.writers = {}
+
+        for folder, schema in [(self.credits_dir, CREDITS_SCHEMA),
+                               (self.persons_dir, PERSONS_SCHEMA)]:
+            path = os.path.join(folder, f'{self.part}.tmp')
+            self.writers[folder] = pq.ParquetWriter(
+                                        path, schema,
+                                        compression=self.compression,
+                                        use_dictionary=['job', 'credit_type',
+                                                        'name', 'department'])
+
+    def flush(self):
+        """
+        Writes the buffered movies as one row group
+        """
+
+        if len(self.buffer_ids) == 0:
+            return
+
+        if self.writers is None:
+            self.open_part()
+
+        self.writers[self.credits_dir].write_table(self.credits.to_table())
+        self.writers[self.persons_dir].write_table(self.persons.to_table())
+
+        self.part_ids.extend(self.buffer_ids)
+        self.buffer_ids = []
+        self.row_groups += 1
+
+        if self.row_groups >= self.row_groups_per_file:
+            self.close_part()
+
+    def close_part(self):
+        """
+        Closes the current part files and reports their movies
+        """
+
+        if self.writers is None:
+            return
+
+        for folder, writer in self.writers.items():
+            writer.close()
+            path = os.path.join(folder, self.part)
+            os.replace(f'{path}.tmp', path)
+
+        if self.on_commit is not None:
+            self.on_commit(self.part, self.part_ids)
+
+        self.writers = None
+        self.row_groups = 0
+        self.part_ids = []
+
+    def close(self):
+        self.flush()
+        self.close_part()
+
+
+def read_persons(directory, parts):
+    """
+    Reads the persons table of the given part files, keeping
+    one row per person.
+
+    Arguments:
+        - directory: folder given to the CreditsWriter
+        - parts: names of the committed part files
+
+    Returns:
+        Dataframe of unique persons
+    """
+
+    paths = [os.path.join(directory, 'persons', part) for part in parts]
+    if len(paths) == 0:
+        return pa.Table.from_pylist([], PERSONS_SCHEMA).to_pandas()
+
+    df = pq.read_table(paths).to_pandas()
+    return df.drop_duplicates('tmdb_person_id').reset_index(drop=True)
+
+
+def iter_credits(directory, parts, persons):
+    """
+    Lazily reads the credits one row group at a time and joins
+    the person details back in.
+
+    Arguments:
+        - directory: folder given to the CreditsWriter
+        - parts: names of the committed part files
+        - persons: dataframe of unique persons
+
+    Returns:
+        generator of credits dataframes
+    """
+
+    columns = ['tmdb_id', 'imdb_id', 'tmdb_person_id', 'name', 'gender',
+               'department', 'job', 'credit_type']
+    columns += [column for column in persons.columns if column not in columns]
+
+    for part in parts:
+        parquet = pq.ParquetFile(os.path.join(directory, 'credits', part))
+
+        for index in range(parquet.num_row_groups):
+            df = parquet.read_row_group(index).to_pandas()
+            df = df.merge(persons, on='tmdb_person_id', how='left')
+            yield df[columns]